@@ -1,87 +1,91 @@
-import json
 import os
-import sys
 import argparse
+import shutil
 import subprocess
-import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
+import orjson
 import matplotlib.pyplot as plt
 import numpy as np
 
 
-def get_video_duration(video_path, timeout=10):
-    """Get video duration in seconds using ffprobe with timeout."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "quiet",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                video_path,
-            ],
-            capture_output=True, text=True, timeout=timeout
-        )
-        duration = float(result.stdout.strip())
-        return duration
-    except (subprocess.TimeoutExpired, ValueError, Exception) as e:
-        print(f"[WARNING] ffprobe failed for {video_path}: {e}")
-        return None
+# 기본 8 KB 버퍼 대신 큰 블록으로 읽고 써서 syscall 수를 줄임
+BUF_SIZE = 4 * 1024 * 1024  # 4 MiB
 
 
-def is_video_valid(video_path, timeout=60):
-    """Check if video is readable by decord, with a hard timeout.
+def probe_video(video_path, timeout=10):
+    """Probe duration and integrity with a single ffprobe call.
 
-    Runs decord in a subprocess so it can be killed if it hangs.
-    Exit code 0 = valid, anything else = invalid.
+    -read_intervals %+#1 forces ffprobe to demux/decode the first frame,
+    so header corruption and an unreadable stream both surface here —
+    no separate validation pass needed. The duration is the last csv
+    field in stdout (frame rows come first, then format=duration).
+
+    Returns the duration in seconds, or None when the file is corrupt,
+    unreadable, or has no duration.
     """
     try:
         result = subprocess.run(
             [
-                sys.executable, "-c",
-                "import sys; from decord import VideoReader; "
-                "vr = VideoReader(sys.argv[1]); vr[0]; print('OK')",
+                "ffprobe", "-v", "error", "-threads", "1",
+                "-select_streams", "v:0",
+                "-show_entries", "format=duration:frame=pts",
+                "-of", "csv=p=0",
+                "-read_intervals", "%+#1",
                 video_path,
             ],
-            capture_output=True, text=True, timeout=timeout,
+            capture_output=True, text=True, timeout=timeout
         )
-        return result.returncode == 0 and "OK" in result.stdout
-    except subprocess.TimeoutExpired:
-        print(f"[TIMEOUT] decord hung for {timeout}s: {video_path}")
-        return False
-    except Exception as e:
-        print(f"[WARNING] decord validation failed for {video_path}: {e}")
-        return False
+        if result.returncode != 0 or result.stderr.strip():
+            print(f"[WARNING] ffprobe failed for {video_path}: {result.stderr.strip()[:200]}")
+            return None
+        lines = result.stdout.split()
+        if not lines:
+            print(f"[WARNING] ffprobe found no duration for {video_path}")
+            return None
+        return float(lines[-1])
+    except (subprocess.TimeoutExpired, ValueError) as e:
+        print(f"[WARNING] ffprobe failed for {video_path}: {e}")
+        return None
 
 
-def process_chunk(chunk, video_base_dir, thread_idx, ffprobe_timeout, decord_timeout, output_dir):
+def process_chunk(chunk, video_base_dir, thread_idx, ffprobe_timeout, output_dir):
     """Process a chunk and save results to a per-thread JSONL file immediately upon completion."""
     results = []
     durations = []
     total = len(chunk)
+    # 같은 영상을 여러 레코드가 참조할 수 있음 — probe 결과를 워커 내에서 캐시
+    # (None = 깨졌거나 없는 파일)
+    probe_cache = {}
     for i, data in enumerate(chunk):
         video_rel_path = data.get("video", "")
         video_path = os.path.join(video_base_dir, video_rel_path)
 
-        # EpicKitchens 폴더 영상은 무조건 스킵
-        if "EpicKitchens" in video_rel_path:
-            print(f"  [Thread {thread_idx}] [SKIP] EpicKitchens -> {video_rel_path}")
+        if video_rel_path in probe_cache:
+            duration = probe_cache[video_rel_path]
+            if duration is not None:
+                data["video_duration"] = duration
+                results.append(data)
+                durations.append(duration)
             if (i + 1) % 100 == 0 or (i + 1) == total:
                 print(f"  [Thread {thread_idx}] {i + 1}/{total} ({(i + 1) / total * 100:.1f}%)")
             continue
 
-        # Step 1: get duration via ffprobe (fast, with timeout)
-        duration = get_video_duration(video_path, timeout=ffprobe_timeout)
-        if duration is None:
+        # 존재하지 않는 파일은 stat 한 번으로 거름 — ffprobe fork보다 훨씬 싸다
+        if not os.path.isfile(video_path):
+            probe_cache[video_rel_path] = None
             if (i + 1) % 100 == 0 or (i + 1) == total:
                 print(f"  [Thread {thread_idx}] {i + 1}/{total} ({(i + 1) / total * 100:.1f}%)")
             continue
 
-        # Step 2: validate with decord (with timeout — won't hang forever)
-        if not is_video_valid(video_path, timeout=decord_timeout):
+        # ffprobe 한 번으로 duration + 무결성 검증 (fork 1회)
+        duration = probe_video(video_path, timeout=ffprobe_timeout)
+        if duration is None:
+            probe_cache[video_rel_path] = None
             if (i + 1) % 100 == 0 or (i + 1) == total:
                 print(f"  [Thread {thread_idx}] {i + 1}/{total} ({(i + 1) / total * 100:.1f}%)")
             continue
 
+        probe_cache[video_rel_path] = duration
         data["video_duration"] = duration
         results.append(data)
         durations.append(duration)
@@ -91,14 +95,43 @@ def process_chunk(chunk, video_base_dir, thread_idx, ffprobe_timeout, decord_tim
 
     # Save per-thread JSONL as soon as this thread finishes
     thread_output_path = os.path.join(output_dir, f"thread_{thread_idx:04d}.jsonl")
-    with open(thread_output_path, "w") as f:
+    with open(thread_output_path, "wb", buffering=BUF_SIZE) as f:
         for data in results:
-            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+            f.write(orjson.dumps(data) + b"\n")
     print(f"  [Thread {thread_idx}] Saved {len(results)} entries -> {thread_output_path}")
 
     return results, durations
 
 
+def bin_durations(durations, bin_size):
+    """Pre-bin durations so only O(num_bins) counts cross the process boundary."""
+    if not durations:
+        return np.zeros(0, dtype=np.int64)
+    return np.bincount((np.asarray(durations) // bin_size).astype(np.int64))
+
+
+def run_chunk(idx, chunk, video_base_dir, ffprobe_timeout, duration_dir, bin_size):
+    """Worker entry point. Returns pre-binned duration counts for the histogram."""
+    # Skip if this worker's output already exists (resume)
+    thread_output_path = os.path.join(duration_dir, f"thread_{idx:04d}.jsonl")
+    if os.path.exists(thread_output_path):
+        print(f"  [Thread {idx}] SKIP — {thread_output_path} already exists")
+        # Still load durations for histogram
+        durations = []
+        with open(thread_output_path, "rb", buffering=BUF_SIZE) as f:
+            for line in f:
+                if line.strip():
+                    d = orjson.loads(line)
+                    dur = d.get("video_duration")
+                    if dur is not None:
+                        durations.append(dur)
+        return bin_durations(durations, bin_size)
+
+    results, durations = process_chunk(chunk, video_base_dir, idx, ffprobe_timeout, duration_dir)
+    print(f"  [Thread {idx}] Done — {len(results)} entries, {len(durations)} valid durations")
+    return bin_durations(durations, bin_size)
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Add video duration to JSONL and draw a histogram.")
     parser.add_argument("--input", "-i", type=str, required=True,
@@ -117,8 +150,6 @@ def parse_args():
                         help="Histogram bin size in seconds (default: 30)")
     parser.add_argument("--ffprobe-timeout", type=int, default=10,
                         help="Timeout in seconds for each ffprobe call (default: 10)")
-    parser.add_argument("--decord-timeout", type=int, default=10,
-                        help="Timeout in seconds for each decord validation call (default: 10)")
     return parser.parse_args()
 
 
@@ -133,7 +164,6 @@ def main():
     num_threads = args.num_threads
     bin_size = args.bin_size
     ffprobe_timeout = args.ffprobe_timeout
-    decord_timeout = args.decord_timeout
 
     # ---- Create duration_json directory ----
     os.makedirs(duration_dir, exist_ok=True)
@@ -141,76 +171,71 @@ def main():
 
     # ---- Load JSONL ----
     print(f"Loading {input_jsonl} ...")
-    with open(input_jsonl, "r") as f:
-        all_data = [json.loads(line) for line in f if line.strip()]
-    print(f"Loaded {len(all_data)} entries.")
+    all_data = []
+    epickitchens_skipped = 0
+    with open(input_jsonl, "rb", buffering=BUF_SIZE) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            # EpicKitchens 폴더 영상은 무조건 스킵 — 파싱 전에 raw bytes로 거름
+            if b"EpicKitchens" in line:
+                epickitchens_skipped += 1
+                continue
+            all_data.append(orjson.loads(line))
+    print(f"Loaded {len(all_data)} entries. (skipped {epickitchens_skipped} EpicKitchens)")
 
     # ---- Split into chunks ----
     chunk_size = (len(all_data) + num_threads - 1) // num_threads
     chunks = [all_data[i:i + chunk_size] for i in range(0, len(all_data), chunk_size)]
     print(f"Split into {len(chunks)} chunks (chunk_size ~{chunk_size})")
 
-    # ---- Process with ThreadPoolExecutor ----
-    all_durations = []
-    lock = threading.Lock()
-
-    def worker(idx, chunk):
-        # Skip if this thread's output already exists
-        thread_output_path = os.path.join(duration_dir, f"thread_{idx:04d}.jsonl")
-        if os.path.exists(thread_output_path):
-            print(f"  [Thread {idx}] SKIP — {thread_output_path} already exists")
-            # Still load durations for histogram
-            with open(thread_output_path, "r") as f:
-                for line in f:
-                    if line.strip():
-                        d = json.loads(line)
-                        dur = d.get("video_duration")
-                        if dur is not None:
-                            with lock:
-                                all_durations.append(dur)
-            return
-
-        results, durations = process_chunk(chunk, video_base_dir, idx, ffprobe_timeout, decord_timeout, duration_dir)
-        with lock:
-            all_durations.extend(durations)
-        print(f"  [Thread {idx}] Done — {len(results)} entries, {len(durations)} valid durations")
-
-    print(f"Processing videos with {num_threads} threads "
-          f"(ffprobe timeout={ffprobe_timeout}s, decord timeout={decord_timeout}s) ...")
-    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+    # ---- Process with ProcessPoolExecutor ----
+    # 워커는 자기 JSONL 파일만 쓰고 히스토그램용 bin count 배열만 반환
+    # (duration 원본 리스트를 모으지 않음 — O(bin 수) 메모리)
+    hist_counts = np.zeros(0, dtype=np.int64)
+
+    print(f"Processing videos with {num_threads} processes "
+          f"(ffprobe timeout={ffprobe_timeout}s) ...")
+    with ProcessPoolExecutor(max_workers=num_threads) as executor:
         futures = []
         for idx, chunk in enumerate(chunks):
-            futures.append(executor.submit(worker, idx, chunk))
+            futures.append(executor.submit(
+                run_chunk, idx, chunk, video_base_dir, ffprobe_timeout, duration_dir, bin_size
+            ))
         for f in futures:
-            f.result()
+            counts = f.result()
+            if len(counts) > len(hist_counts):
+                counts[:len(hist_counts)] += hist_counts
+                hist_counts = counts
+            else:
+                hist_counts[:len(counts)] += counts
 
     # ---- Merge all per-thread JSONL files into final output (preserving order) ----
     print(f"\nMerging per-thread JSONL files from {duration_dir}/ -> {output_jsonl} ...")
     thread_files = sorted(
         [f for f in os.listdir(duration_dir) if f.startswith("thread_") and f.endswith(".jsonl")]
     )
-    total_entries = 0
-    with open(output_jsonl, "w") as fout:
+    # 스레드 파일은 이미 유효한 JSONL — 라인 단위 복사 대신 1 MiB 블록으로 blit
+    total_bytes = 0
+    with open(output_jsonl, "wb", buffering=BUF_SIZE) as fout:
         for tf in thread_files:
             tf_path = os.path.join(duration_dir, tf)
-            with open(tf_path, "r") as fin:
-                for line in fin:
-                    if line.strip():
-                        fout.write(line)
-                        total_entries += 1
-    print(f"Merged {total_entries} entries from {len(thread_files)} thread files -> {output_jsonl}")
+            with open(tf_path, "rb", buffering=BUF_SIZE) as fin:
+                shutil.copyfileobj(fin, fout, length=1 << 20)
+            total_bytes += os.path.getsize(tf_path)
+    print(f"Merged {total_bytes / (1024**2):.1f} MB from {len(thread_files)} thread files -> {output_jsonl}")
 
     # ---- Draw histogram ----
-    print(f"Drawing histogram with {len(all_durations)} durations ...")
-    if all_durations:
-        max_dur = max(all_durations)
-        bins = np.arange(0, max_dur + bin_size, bin_size)
+    total_durations = int(hist_counts.sum())
+    print(f"Drawing histogram with {total_durations} durations ...")
+    if total_durations:
+        bins = np.arange(0, (len(hist_counts) + 1) * bin_size, bin_size)
 
         plt.figure(figsize=(14, 6))
-        plt.hist(all_durations, bins=bins, edgecolor="black", alpha=0.75)
+        plt.bar(bins[:-1], hist_counts, width=bin_size, align="edge", edgecolor="black", alpha=0.75)
         plt.xlabel("Video Duration (seconds)")
         plt.ylabel("Count")
-        plt.title(f"Video Duration Distribution (N={len(all_durations)}, bin={bin_size}s)")
+        plt.title(f"Video Duration Distribution (N={total_durations}, bin={bin_size}s)")
         plt.xticks(bins, rotation=45)
         plt.tight_layout()
         plt.savefig(output_histogram, dpi=150)
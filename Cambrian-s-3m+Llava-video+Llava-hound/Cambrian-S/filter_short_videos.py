@@ -1,57 +1,134 @@
 import argparse
-import json
+import mmap
 import os
-import subprocess
+import shutil
 import time
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from multiprocessing import Manager
+
+import av
+import orjson
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 """
 python filter_short_videos.py cambrian_s_3m_filtered.jsonl --output cambrian_s_3m_filtered_over5s.jsonl
 """
 
 
+# 기본 8 KB 버퍼 대신 큰 블록으로 읽고 써서 syscall 수를 줄임
+BUF_SIZE = 4 * 1024 * 1024  # 4 MiB
+
+# 워커당 동시에 돌릴 probe 스레드 수 — av.open은 헤더(moov) 바이트만 읽는
+# I/O bound 호출이고 GIL을 풀기 때문에 스레드로 디스크 지연을 겹침
+PROBE_WORKERS = 32
+
+
 def get_duration(video_path):
+    """ffprobe fork/exec 없이 PyAV로 컨테이너 헤더에서 duration만 읽음"""
     try:
-        result = subprocess.run(
-            ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", video_path],
-            capture_output=True, text=True, timeout=10
-        )
-        info = json.loads(result.stdout)
-        return float(info["format"]["duration"])
+        with av.open(video_path, metadata_errors="ignore") as container:
+            if container.duration is None:
+                return None
+            return container.duration / av.time_base
     except Exception:
         return None
 
 
-def process_chunk(chunk_id, lines, video_root):
-    """각 청크를 처리하고 결과를 반환"""
-    kept = []
+def load_duration_cache(cache_path):
+    """이전 실행이 남긴 (경로, mtime, size) → duration 캐시를 로드.
+
+    재실행/중단 후 재개 시 이미 본 파일은 probe 없이 dict 조회로 끝남.
+    파일이 바뀌면 mtime/size가 달라져 키가 미스나므로 stale 걱정 없음.
+    """
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, "rb", buffering=BUF_SIZE) as f:
+            for line in f:
+                if line.strip():
+                    entry = orjson.loads(line)
+                    cache[entry["k"]] = entry["d"]
+    return cache
+
+
+def find_chunk_offsets(path, n):
+    """파일을 n개의 바이트 범위로 나눔 (경계는 개행 문자에 맞춤)"""
+    size = os.path.getsize(path)
+    if size == 0:
+        # 빈 파일은 mmap이 ValueError를 던짐 — 빈 범위 n개 반환
+        return [0] * (n + 1)
+    offsets = [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, n):
+            pos = size * i // n
+            # 대략적 경계에서 다음 개행까지 이동
+            nl = mm.find(b"\n", pos)
+            offsets.append(size if nl == -1 else nl + 1)
+    offsets.append(size)
+    return offsets
+
+
+def process_chunk(chunk_id, path, start, end, video_root, cache_path):
+    """바이트 범위 [start, end)를 mmap으로 읽고 PyAV 스레드 풀로 처리"""
+    if end > start:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = [line for line in mm[start:end].split(b"\n") if line.strip()]
+    else:
+        # 빈 범위 (빈 입력 파일) — mmap 없이 빈 청크로 진행
+        lines = []
+
+    total = len(lines)
+    paths = [
+        os.path.join(video_root, orjson.loads(line).get("video", ""))
+        for line in lines
+    ]
+
+    cache = load_duration_cache(cache_path)
+    new_entries = []
+
+    def probe(video_path):
+        try:
+            st = os.stat(video_path)
+        except OSError:
+            return None, None
+        key = f"{os.path.abspath(video_path)}\t{st.st_mtime_ns}\t{st.st_size}"
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, None
+        duration = get_duration(video_path)
+        if duration is None:
+            return None, None
+        return duration, (key, duration)
+
+    keep_flags = [False] * total
     skipped = 0
     error = 0
-    total = len(lines)
+    hits = 0
 
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        for i, (duration, new_entry) in enumerate(executor.map(probe, paths, chunksize=64)):
+            if new_entry is not None:
+                new_entries.append(new_entry)
+            elif duration is not None:
+                hits += 1
 
-        data = json.loads(line)
-        video_rel = data.get("video", "")
-        video_path = os.path.join(video_root, video_rel)
+            if duration is None:
+                error += 1
+            elif duration >= 5.0:
+                keep_flags[i] = True
+            else:
+                skipped += 1
 
-        duration = get_duration(video_path)
-        if duration is None:
-            error += 1
-        elif duration >= 5.0:
-            kept.append(json.dumps(data, ensure_ascii=False))
-        else:
-            skipped += 1
+            if (i + 1) % 10000 == 0:
+                print(f"[Chunk {chunk_id:2d}] {i + 1}/{total} | kept {sum(keep_flags)} | skipped {skipped} | error {error} | cache hit {hits}")
 
-        if (i + 1) % 10000 == 0:
-            print(f"[Chunk {chunk_id:2d}] {i+1}/{total} | kept {len(kept)} | skipped {skipped} | error {error}")
+    # 새로 probe한 duration은 part 파일로 기록 — 메인이 캐시에 합침
+    if cache_path and new_entries:
+        with open(f"{cache_path}.part{chunk_id:02d}", "wb", buffering=BUF_SIZE) as f:
+            for key, duration in new_entries:
+                f.write(orjson.dumps({"k": key, "d": duration}) + b"\n")
 
-    print(f"[Chunk {chunk_id:2d}] DONE {total}/{total} | kept {len(kept)} | skipped {skipped} | error {error}")
-    return chunk_id, kept, skipped, error
+    # 레코드를 수정하지 않으므로 재직렬화 없이 입력 라인 그대로 유지 (입력 순서 보존)
+    kept = [lines[i] for i in range(total) if keep_flags[i]]
+    print(f"[Chunk {chunk_id:2d}] DONE {total}/{total} | kept {len(kept)} | skipped {skipped} | error {error} | cache hit {hits}")
+    return chunk_id, kept, skipped, error, total
 
 
 def main():
@@ -60,56 +137,60 @@ def main():
     parser.add_argument("--video-root", default=".", help="Root directory where video files are stored")
     parser.add_argument("--output", default="cambrian_s_3m_filtered_over5s.jsonl", help="Output JSONL file")
     parser.add_argument("--workers", type=int, default=12, help="Number of parallel workers")
+    parser.add_argument("--duration-cache", default="duration_cache.jsonl",
+                        help="Persistent duration cache keyed by (path, mtime, size); '' disables")
     args = parser.parse_args()
 
-    # 1. 전체 데이터 로드
-    print(f"Loading {args.jsonl} ...")
+    # 1. 바이트 범위로 N등분 — 파일 전체를 메모리에 올리지 않고,
+    #    워커가 각자 mmap으로 자기 범위만 읽음 (pickle 복사 없음)
+    print(f"Scanning chunk boundaries in {args.jsonl} ...")
     t0 = time.time()
-    with open(args.jsonl, "r") as f:
-        all_lines = f.readlines()
-    total_lines = len(all_lines)
-    print(f"Loaded {total_lines:,} lines in {time.time()-t0:.1f}s")
-
-    # 2. N등분
     n = args.workers
-    chunk_size = (total_lines + n - 1) // n
-    chunks = []
-    for i in range(n):
-        start = i * chunk_size
-        end = min(start + chunk_size, total_lines)
-        chunks.append(all_lines[start:end])
-    print(f"Split into {n} chunks (each ~{chunk_size:,} lines)")
-
-    # 메모리 절약: 원본 리스트 해제
-    del all_lines
-
-    # 3. 병렬 처리
+    offsets = find_chunk_offsets(args.jsonl, n)
+    file_size = offsets[-1]
+    print(f"File size {file_size / (1024**3):.2f} GB, split into {n} byte ranges "
+          f"in {time.time()-t0:.1f}s")
+
+    # 2. 병렬 처리
     print(f"Starting {n} workers ...")
     t1 = time.time()
     results = [None] * n
 
     with ProcessPoolExecutor(max_workers=n) as executor:
         futures = {
-            executor.submit(process_chunk, i, chunks[i], args.video_root): i
+            executor.submit(process_chunk, i, args.jsonl, offsets[i], offsets[i + 1],
+                            args.video_root, args.duration_cache): i
             for i in range(n)
         }
+        total_lines = 0
         for future in as_completed(futures):
-            chunk_id, kept, skipped, error = future.result()
+            chunk_id, kept, skipped, error, n_lines = future.result()
             results[chunk_id] = (kept, skipped, error)
+            total_lines += n_lines
 
     elapsed = time.time() - t1
     print(f"\nAll workers finished in {elapsed/60:.1f} min ({elapsed:.0f}s)")
 
+    # 3. 워커가 남긴 캐시 part 파일을 캐시에 합침 (다음 실행에서 재사용)
+    if args.duration_cache:
+        with open(args.duration_cache, "ab", buffering=BUF_SIZE) as fout:
+            for i in range(n):
+                part = f"{args.duration_cache}.part{i:02d}"
+                if os.path.exists(part):
+                    with open(part, "rb", buffering=BUF_SIZE) as fin:
+                        shutil.copyfileobj(fin, fout, length=1 << 20)
+                    os.remove(part)
+
     # 4. 결과 합치기 & 저장
     print(f"Merging results and writing to {args.output} ...")
     total_kept = 0
     total_skipped = 0
     total_error = 0
 
-    with open(args.output, "w") as fout:
+    with open(args.output, "wb", buffering=BUF_SIZE) as fout:
         for chunk_id, (kept, skipped, error) in enumerate(results):
             for line in kept:
-                fout.write(line + "\n")
+                fout.write(line + b"\n")
             total_kept += len(kept)
             total_skipped += skipped
             total_error += error
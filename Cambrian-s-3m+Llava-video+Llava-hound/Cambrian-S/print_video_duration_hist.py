@@ -1,8 +1,19 @@
-import json
 import sys
 import random
 import os
-from collections import defaultdict
+import re
+import mmap
+from array import array
+
+import numpy as np
+import orjson
+
+# 기본 8 KB 버퍼 대신 큰 블록으로 써서 syscall 수를 줄임
+BUF_SIZE = 4 * 1024 * 1024  # 4 MiB
+
+# 레코드에서 쓰는 필드는 video_duration 하나뿐 — 전체 JSON 파싱 대신
+# bytes 정규식으로 값만 뽑고, 못 찾은 라인만 orjson으로 확인
+DUR_RE = re.compile(rb'"video_duration"\s*:\s*(-?[0-9][0-9.eE+-]*)')
 
 def format_table(title, counts, unit_seconds, format_label_fn):
     print(f"\n{'='*55}")
@@ -10,10 +21,12 @@ def format_table(title, counts, unit_seconds, format_label_fn):
     print(f"{'='*55}")
     print(f"  {'구간':<25} {'데이터 수':>10} {'비율':>10}")
     print(f"  {'-'*43}")
-    total = sum(counts.values())
-    for key in sorted(counts.keys()):
-        label = format_label_fn(key, unit_seconds)
-        count = counts[key]
+    # counts는 bincount가 준 dense 배열 — dict 해싱/정렬 없이 순서대로 순회
+    total = int(np.sum(counts))
+    for bucket, count in enumerate(counts):
+        if not count:
+            continue
+        label = format_label_fn(bucket, unit_seconds)
         ratio = count / total * 100 if total > 0 else 0
         print(f"  {label:<25} {count:>10,} {ratio:>9.2f}%")
     print(f"  {'-'*43}")
@@ -60,42 +73,70 @@ def main():
     print(f"\n파일 로딩 중: {filepath}")
     print(f"설정 → pivot: {pivot_min}분({pivot_sec}초) | short: {short_pct}% | long: {long_pct}%")
 
-    short_data = []  # pivot 미만
-    long_data  = []  # pivot 이상
-    counts_30s  = defaultdict(int)
-    counts_5min = defaultdict(int)
+    # 빈 파일은 mmap이 ValueError를 던짐 — 처리할 라인도 없으니 종료
+    if os.path.getsize(filepath) == 0:
+        print("빈 파일입니다 — 처리할 라인이 없습니다.")
+        return
+
+    # 1차 패스: duration과 각 라인의 바이트 범위만 기록 — 원본 라인은
+    # 메모리에 들고 있지 않고, 2차 패스는 선택된 범위로 바로 seek
+    # (span 배열은 클래스별 flat array.array('q'): [start0, end0, start1, ...])
+    durations = []
+    short_spans = array("q")
+    long_spans = array("q")
     total_lines = 0
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        for i, line in enumerate(f):
-            if (i + 1) % 500_000 == 0:
-                print(f"  {i+1:,}개 처리 중...")
-            line = line.strip()
+    # 텍스트 모드 readline 대신 mmap + find: 개행 탐색이 C(memchr)에서 돌고
+    # UTF-8 디코딩 없이 bytes를 orjson에 바로 넘김
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        find = mm.find
+        start = 0
+        i = 0
+        while start < size:
+            end = find(b"\n", start)
+            if end == -1:
+                end = size
+            line = mm[start:end].strip()
+            span_start, span_end = start, end
+            start = end + 1
+            i += 1
+            if i % 500_000 == 0:
+                print(f"  {i:,}개 처리 중...")
             if not line:
                 continue
             total_lines += 1
-            data = json.loads(line)
-            duration = data.get("video_duration", None)
+            m = DUR_RE.search(line)
+            if m:
+                duration = float(m.group(1))
+            else:
+                duration = orjson.loads(line).get("video_duration", None)
             if duration is None:
                 continue
 
-            # 히스토그램 버킷
-            counts_30s[int(duration // 30)] += 1
-            counts_5min[int(duration // 300)] += 1
+            durations.append(duration)
+            spans = short_spans if duration < pivot_sec else long_spans
+            spans.append(span_start)
+            spans.append(span_end)
 
-            if duration < pivot_sec:
-                short_data.append(line)
-            else:
-                long_data.append(line)
+    # 히스토그램 버킷: 레코드별 파이썬 연산 대신 numpy로 한 번에 계산
+    # 5분 버킷은 정확히 30초 버킷 10개의 합 — bincount는 한 번이면 충분
+    d = np.asarray(durations, dtype=np.float64)
+    c30 = np.bincount((d // 30).astype(np.int64)) if len(d) else np.zeros(0, np.int64)
+    c30p = np.pad(c30, (0, (-len(c30)) % 10))
+    c5min = c30p.reshape(-1, 10).sum(axis=1)
+
+    n_short_total = len(short_spans) // 2
+    n_long_total = len(long_spans) // 2
 
     print(f"\n총 {total_lines:,}개 데이터 로딩 완료!")
-    all_durations_count = len(short_data) + len(long_data)
-    print(f"  {pivot_min}분 미만: {len(short_data):,}개")
-    print(f"  {pivot_min}분 이상: {len(long_data):,}개")
+    all_durations_count = n_short_total + n_long_total
+    print(f"  {pivot_min}분 미만: {n_short_total:,}개")
+    print(f"  {pivot_min}분 이상: {n_long_total:,}개")
 
     # 분포 테이블 출력
-    format_table("30초 단위 분포", counts_30s, 30, seconds_to_label_30s)
-    format_table("5분 단위 분포", counts_5min, 300, seconds_to_label_5min)
+    format_table("30초 단위 분포", c30, 30, seconds_to_label_30s)
+    format_table("5분 단위 분포", c5min, 300, seconds_to_label_5min)
 
     # --- 샘플링 및 저장 ---
     base = os.path.splitext(filepath)[0]
@@ -109,25 +150,36 @@ def main():
     print("  샘플링 및 저장")
     print(f"{'='*55}")
 
-    # short 샘플링
-    random.shuffle(short_data)
-    n_short = max(1, round(len(short_data) * short_pct / 100))
-    sampled_short = short_data[:n_short]
-    print(f"\n  [under {pivot_min}min] {len(short_data):,}개 중 {short_pct}% → {n_short:,}개 추출")
-    print(f"  저장 중: {out_short}")
-    with open(out_short, "w", encoding="utf-8") as f:
-        f.write("\n".join(sampled_short) + "\n")
+    # 클래스별로 뽑을 인덱스를 먼저 정함 — 전체 permutation(shuffle) 대신
+    # random.sample: k ≪ N이면 O(k)로 뽑고 버려지는 스왑이 없음
+    n_short = max(1, round(n_short_total * short_pct / 100))
+    n_long = max(1, round(n_long_total * long_pct / 100)) if n_long_total else 0
+
+    def select_spans(spans, n_total, k):
+        # 100% 추출이면 RNG/정렬 없이 이미 오프셋 순서인 전체를 그대로 사용
+        if k >= n_total:
+            return list(zip(spans[0::2], spans[1::2]))
+        keep = random.sample(range(n_total), k)
+        # 오프셋 오름차순으로 정렬해 순차 I/O 유지
+        return sorted((spans[2 * i], spans[2 * i + 1]) for i in keep)
+
+    sel_short = select_spans(short_spans, n_short_total, min(n_short, n_short_total))
+    sel_long = select_spans(long_spans, n_long_total, n_long)
+
+    print(f"\n  [under {pivot_min}min] {n_short_total:,}개 중 {short_pct}% → {n_short:,}개 추출")
+    print(f"  [over  {pivot_min}min] {n_long_total:,}개 중 {long_pct}% → {n_long:,}개 추출")
+
+    # 2차 패스: 전체 재스캔 없이 기록해 둔 바이트 범위만 mmap에서 잘라 기록
+    print(f"  저장 중: {out_short}, {out_long}")
+    with open(filepath, "rb") as f, \
+         mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+         open(out_short, "wb", buffering=BUF_SIZE) as fs, \
+         open(out_long, "wb", buffering=BUF_SIZE) as fl:
+        for s, e in sel_short:
+            fs.write(mm[s:e].strip() + b"\n")
+        for s, e in sel_long:
+            fl.write(mm[s:e].strip() + b"\n")
     print(f"  ✓ 저장 완료: {out_short}")
-
-    # long 샘플링
-    random.shuffle(long_data)
-    n_long = max(1, round(len(long_data) * long_pct / 100)) if long_data else 0
-    sampled_long = long_data[:n_long]
-    print(f"\n  [over  {pivot_min}min] {len(long_data):,}개 중 {long_pct}% → {n_long:,}개 추출")
-    print(f"  저장 중: {out_long}")
-    with open(out_long, "w", encoding="utf-8") as f:
-        if sampled_long:
-            f.write("\n".join(sampled_long) + "\n")
     print(f"  ✓ 저장 완료: {out_long}")
 
     total_out = n_short + n_long
@@ -1,10 +1,17 @@
 import os
-import re
 import math
 import subprocess
 import sys
 import argparse
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 동시에 돌릴 tar 프로세스 수 — 각 zstd가 -T0로 내부 스레드를 추가로 씀
+EXTRACT_WORKERS = 4
+
+# 동시 다운로드 수 — HF CDN은 단일 커넥션으로 대역폭이 안 차므로
+# 여러 파일을 겹쳐 받아 TLS/리다이렉트 지연을 흡수
+DOWNLOAD_WORKERS = 8
 
 # ============================================================
 # Config (defaults)
@@ -104,10 +111,24 @@ class ProgressTracker:
         self.progress_dir = os.path.join(download_dir, ".progress")
         self.downloaded_file = os.path.join(self.progress_dir, "downloaded.txt")
         self.extracted_file = os.path.join(self.progress_dir, "extracted.txt")
+        # Lazily-loaded in-memory caches; kept in sync by mark_* so the
+        # files are only read once per run instead of on every check.
+        self._downloaded = None
+        self._extracted = None
+        # Persistent append handles (opened in init) so mark_* doesn't
+        # open+close the file per entry.
+        self._dl_fp = None
+        self._ex_fp = None
 
     def init(self):
-        """Initialize progress tracking directory."""
+        """Initialize progress tracking directory and preload progress caches."""
         os.makedirs(self.progress_dir, exist_ok=True)
+        # 이후의 is_downloaded/is_extracted는 전부 메모리 set 조회
+        self._downloaded = self._load_set(self.downloaded_file)
+        self._extracted = self._load_set(self.extracted_file)
+        # line-buffered: 항목마다 바로 flush되어 중단돼도 진행 상황 유지
+        self._dl_fp = open(self.downloaded_file, "a", buffering=1)
+        self._ex_fp = open(self.extracted_file, "a", buffering=1)
 
     def _load_set(self, filepath):
         """Load a set of filenames from a text file."""
@@ -122,26 +143,27 @@ class ProgressTracker:
             for item in sorted(items):
                 f.write(f"{item}\n")
 
-    def _append_item(self, filepath, item):
-        """Append a single item to a text file."""
-        with open(filepath, "a") as f:
-            f.write(f"{item}\n")
-
     def get_downloaded(self):
-        """Get set of already downloaded files."""
-        return self._load_set(self.downloaded_file)
+        """Get set of already downloaded files (cached)."""
+        if self._downloaded is None:
+            self._downloaded = self._load_set(self.downloaded_file)
+        return self._downloaded
 
     def get_extracted(self):
-        """Get set of already extracted files."""
-        return self._load_set(self.extracted_file)
+        """Get set of already extracted files (cached)."""
+        if self._extracted is None:
+            self._extracted = self._load_set(self.extracted_file)
+        return self._extracted
 
     def mark_downloaded(self, filename):
         """Mark a file as downloaded."""
-        self._append_item(self.downloaded_file, filename)
+        self.get_downloaded().add(filename)
+        self._dl_fp.write(f"{filename}\n")
 
     def mark_extracted(self, filename):
         """Mark a file as extracted."""
-        self._append_item(self.extracted_file, filename)
+        self.get_extracted().add(filename)
+        self._ex_fp.write(f"{filename}\n")
 
     def is_downloaded(self, filename):
         """Check if a file was already downloaded."""
@@ -235,11 +257,10 @@ def select_files_to_download(files, file_info, exclude_prefixes, sample_ratio, t
     for f in tar_files:
         basename = os.path.basename(f)
         name_without_ext = basename.replace(".tar.zst", "")
-        match = re.match(r"^(.+?)_(\d+)$", name_without_ext)
-        if match:
-            dataset_name = match.group(1)
-            part_num = int(match.group(2))
-            dataset_groups[dataset_name].append((part_num, f))
+        # 파일명 형식이 단순해서 정규식 대신 rpartition으로 충분
+        dataset_name, sep, tail = name_without_ext.rpartition("_")
+        if sep and tail.isdigit():
+            dataset_groups[dataset_name].append((int(tail), f))
 
     for name in dataset_groups:
         dataset_groups[name].sort(key=lambda x: x[0])
@@ -334,21 +355,27 @@ def download_files(download_list, download_dir, repo_id, tracker, dry_run=False)
 
     os.makedirs(download_dir, exist_ok=True)
 
+    def download_one(filepath):
+        hf_hub_download(
+            repo_id=repo_id,
+            filename=filepath,
+            repo_type="dataset",
+            local_dir=download_dir,
+        )
+
     failed = []
-    for i, filepath in enumerate(download_list, 1):
-        print(f"\n  [{i}/{len(download_list)}] Downloading: {filepath}")
-        try:
-            hf_hub_download(
-                repo_id=repo_id,
-                filename=filepath,
-                repo_type="dataset",
-                local_dir=download_dir,
-            )
-            tracker.mark_downloaded(filepath)
-            print(f"    [OK] Done")
-        except Exception as e:
-            print(f"    [FAIL] {e}")
-            failed.append(filepath)
+    print(f"  Downloading with {DOWNLOAD_WORKERS} parallel connections...")
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = {executor.submit(download_one, f): f for f in download_list}
+        for i, future in enumerate(as_completed(futures), 1):
+            filepath = futures[future]
+            try:
+                future.result()
+                tracker.mark_downloaded(filepath)
+                print(f"  [{i}/{len(download_list)}] [OK] {filepath}")
+            except Exception as e:
+                print(f"  [{i}/{len(download_list)}] [FAIL] {filepath}: {e}")
+                failed.append(filepath)
 
     if failed:
         print(f"\n  Failed downloads: {len(failed)}")
@@ -363,6 +390,24 @@ def download_files(download_list, download_dir, repo_id, tracker, dry_run=False)
 # ============================================================
 # Step 5: Decompress
 # ============================================================
+def extract_one(download_dir, file):
+    """Extract a single .tar.zst archive. Returns (file, dir_name, result)."""
+    name_without_ext = file.replace(".tar.zst", "")
+    head, sep, tail = name_without_ext.rpartition("_")
+    dir_name = head if sep and tail.isdigit() else name_without_ext
+    target_dir = os.path.join(download_dir, dir_name)
+
+    os.makedirs(target_dir, exist_ok=True)
+
+    filepath = os.path.join(download_dir, file)
+    result = subprocess.run(
+        ["tar", "--use-compress-program=zstd -T0 -d", "-xf", filepath, "-C", target_dir],
+        capture_output=True,
+        text=True,
+    )
+    return file, dir_name, result
+
+
 def decompress_files(download_dir, tracker, dry_run=False):
     """
     Decompress .tar.zst files.
@@ -400,27 +445,23 @@ def decompress_files(download_dir, tracker, dry_run=False):
             print(f"    - {f}")
         return
 
-    for i, file in enumerate(sorted(to_extract), 1):
-        name_without_ext = file.replace(".tar.zst", "")
-        dir_name = re.sub(r"_\d+$", "", name_without_ext)
-        target_dir = os.path.join(download_dir, dir_name)
-
-        print(f"\n  [{i}/{len(to_extract)}] {file} -> {dir_name}/")
-
-        os.makedirs(target_dir, exist_ok=True)
-
-        filepath = os.path.join(download_dir, file)
-        result = subprocess.run(
-            ["tar", "-I", "zstd", "-xf", filepath, "-C", target_dir],
-            capture_output=True,
-            text=True,
-        )
+    # 아카이브는 서로 독립적(위 NOTE 참고)이므로 병렬로 풀어도 안전
+    workers = min(EXTRACT_WORKERS, os.cpu_count() or 1)
+    print(f"  Extracting with {workers} parallel tar processes (zstd -T0 each)...")
 
-        if result.returncode == 0:
-            tracker.mark_extracted(file)
-            print(f"    [OK] Decompressed")
-        else:
-            print(f"    [FAIL] {result.stderr}")
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(extract_one, download_dir, f): f for f in sorted(to_extract)
+        }
+        for future in as_completed(futures):
+            file, dir_name, result = future.result()
+            done += 1
+            if result.returncode == 0:
+                tracker.mark_extracted(file)
+                print(f"  [{done}/{len(to_extract)}] [OK] {file} -> {dir_name}/")
+            else:
+                print(f"  [{done}/{len(to_extract)}] [FAIL] {file}: {result.stderr}")
 
     print("\n  Decompression complete!")
 
@@ -8,12 +8,20 @@ import os
 import sys
 from pathlib import Path
 from collections import defaultdict
-import subprocess
-import json
+from concurrent.futures import ThreadPoolExecutor
+import av
+import numpy as np
 
 
-# Video file extensions to check
-VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm', '.m4v', '.mpg', '.mpeg'}
+# libav는 파일 I/O 동안 GIL을 놓으므로 스레드로 충분히 겹쳐짐
+PROBE_WORKERS = 32
+
+
+# Video file extensions to check (tuple so str.endswith runs in C)
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm', '.m4v', '.mpg', '.mpeg')
+
+# Directory names to skip when exclude_image_dirs is on
+IMAGE_DIR_NAMES = {'image', 'images'}
 
 
 class Logger:
@@ -36,67 +44,66 @@ class Logger:
 
 def get_video_info(video_path):
     """
-    Get video resolution and duration using ffprobe.
+    Get video resolution and duration using PyAV (in-process libavformat).
     Returns: (width, height, duration_seconds) or None if failed
     """
     try:
-        cmd = [
-            'ffprobe',
-            '-v', 'error',
-            '-select_streams', 'v:0',
-            '-show_entries', 'stream=width,height,duration',
-            '-show_entries', 'format=duration',
-            '-of', 'json',
-            str(video_path)
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            return None
-        
-        data = json.loads(result.stdout)
-        
-        # Get resolution from stream
-        if 'streams' in data and len(data['streams']) > 0:
-            stream = data['streams'][0]
-            width = stream.get('width')
-            height = stream.get('height')
-            duration = stream.get('duration')
+        # ffprobe subprocess 대신 in-process로 헤더만 읽음 —
+        # 파일마다 fork+exec+JSON 파싱 비용이 사라짐
+        with av.open(str(video_path), metadata_errors='ignore') as container:
+            if not container.streams.video:
+                return None
+            stream = container.streams.video[0]
+            width = stream.width
+            height = stream.height
             
-            # If duration not in stream, try format
-            if duration is None and 'format' in data:
-                duration = data['format'].get('duration')
+            # Stream duration first; fall back to container duration
+            if stream.duration is not None and stream.time_base is not None:
+                duration = float(stream.duration * stream.time_base)
+            elif container.duration is not None:
+                duration = container.duration / av.time_base
+            else:
+                duration = 0.0
             
             if width and height:
-                duration = float(duration) if duration else 0.0
                 return (int(width), int(height), duration)
         
         return None
         
     except Exception as e:
-        print(f"    ⚠ 오류 ({video_path.name}): {e}")
+        print(f"    ⚠ 오류 ({os.path.basename(video_path)}): {e}")
         return None
 
 
-def find_video_files(directory, exclude_image_dirs=True):
+def iter_video_files(directory, exclude_image_dirs=True):
     """
-    Find all video files in directory.
+    Yield video file paths under directory.
     If exclude_image_dirs is True, skip directories named 'image' or 'images'.
     """
-    video_files = []
-    directory = Path(directory)
-    
-    for root, dirs, files in os.walk(directory):
-        # Skip 'image' or 'images' directories
-        if exclude_image_dirs:
-            dirs[:] = [d for d in dirs if d.lower() not in ['image', 'images']]
-        
-        for file in files:
-            if Path(file).suffix.lower() in VIDEO_EXTENSIONS:
-                video_files.append(Path(root) / file)
-    
-    return video_files
+    # os.walk + Path 대신 os.scandir: 파일마다 Path 객체를 만들지 않고
+    # Linux에선 dirent 타입 정보로 추가 stat()도 없음
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if exclude_image_dirs and entry.name.lower() in IMAGE_DIR_NAMES:
+                        continue
+                    yield from iter_video_files(entry.path, exclude_image_dirs)
+                elif entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                    yield entry.path
+    except OSError:
+        # os.walk(onerror=None 기본값)처럼 못 읽는 디렉토리(권한 거부,
+        # 스캔 중 삭제 등)는 조용히 건너뜀 — 전체 분석을 중단하지 않음
+        return
+
+
+def find_video_files(directory, exclude_image_dirs=True):
+    """Find all video files in directory."""
+    return list(iter_video_files(directory, exclude_image_dirs))
 
 
 def analyze_dataset(dataset_path, dataset_name):
@@ -119,24 +126,29 @@ def analyze_dataset(dataset_path, dataset_name):
     durations = []
     
     failed_count = 0
-    for i, video_file in enumerate(video_files, 1):
-        if i % 100 == 0:
-            print(f"  진행: {i}/{len(video_files)} ({i*100//len(video_files)}%)")
-        
-        info = get_video_info(video_file)
-        if info:
-            width, height, duration = info
-            widths.append(width)
-            heights.append(height)
-            durations.append(duration)
-        else:
-            failed_count += 1
+    # 파일 열기/헤더 파싱은 I/O-bound — 스레드 풀로 여러 개를 겹쳐 실행
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        for i, info in enumerate(executor.map(get_video_info, video_files), 1):
+            if i % 100 == 0:
+                print(f"  진행: {i}/{len(video_files)} ({i*100//len(video_files)}%)")
+
+            if info:
+                width, height, duration = info
+                widths.append(width)
+                heights.append(height)
+                durations.append(duration)
+            else:
+                failed_count += 1
     
     if not widths:
         print("  ⚠ 비디오 정보를 추출할 수 없습니다.")
         return None
     
-    # Calculate statistics
+    # Calculate statistics — 파이썬 min/max/sum 루프 대신 numpy 벡터 연산
+    w = np.fromiter(widths, np.int32, len(widths))
+    h = np.fromiter(heights, np.int32, len(heights))
+    d = np.fromiter(durations, np.float64, len(durations))
+
     stats = {
         'dataset': dataset_name,
         'total_videos': len(video_files),
@@ -144,20 +156,20 @@ def analyze_dataset(dataset_path, dataset_name):
         'failed_videos': failed_count,
         'resolution': {
             'width': {
-                'min': min(widths),
-                'max': max(widths),
-                'avg': sum(widths) / len(widths)
+                'min': int(w.min()),
+                'max': int(w.max()),
+                'avg': float(w.mean())
             },
             'height': {
-                'min': min(heights),
-                'max': max(heights),
-                'avg': sum(heights) / len(heights)
+                'min': int(h.min()),
+                'max': int(h.max()),
+                'avg': float(h.mean())
             }
         },
         'duration': {
-            'min': min(durations),
-            'max': max(durations),
-            'avg': sum(durations) / len(durations)
+            'min': float(d.min()),
+            'max': float(d.max()),
+            'avg': float(d.mean())
         }
     }
     
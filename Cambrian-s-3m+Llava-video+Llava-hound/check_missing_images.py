@@ -28,81 +28,165 @@ python check_missing_images.py \
 """
 
 import argparse
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+
+import orjson
 from tqdm import tqdm
 
+# stat은 (특히 NFS/FUSE에서) 블로킹 왕복 — 스레드로 겹치면 거의 선형으로 빨라짐
+STAT_WORKERS = 16
+STAT_BATCH = 4096
 
-def load_data(json_path):
-    """JSON 또는 JSONL 파일을 로드합니다."""
-    data_list = []
-    
-    with open(json_path, 'r', encoding='utf-8') as f:
+# 기본 8 KB 버퍼 대신 큰 블록으로 써서 syscall 수를 줄임
+BUF_SIZE = 4 * 1024 * 1024  # 4 MiB
+
+
+def iter_data(json_path):
+    """JSON 또는 JSONL 파일에서 (원본 라인 bytes, 파싱된 레코드)를 생성합니다.
+
+    JSONL은 한 줄씩 파싱해서 바로 내보내므로 파일 전체를 메모리에
+    올리지 않습니다 (멀티 GB 파일에서 RSS가 레코드 하나 수준).
+    원본 bytes를 같이 돌려주므로 레코드를 수정하지 않는 소비자는
+    재직렬화 없이 그대로 기록할 수 있음 (JSON 배열 입력이면 None).
+    """
+    # 바이너리 모드 + orjson: UTF-8 디코딩 없이 bytes를 바로 파싱
+    with open(json_path, 'rb') as f:
         # 파일 확장자로 JSON/JSONL 구분
         if json_path.endswith('.jsonl'):
             # JSONL 형식: 각 줄이 하나의 JSON 객체
             for line in f:
-                line = line.strip()
-                if line:
-                    data_list.append(json.loads(line))
+                if line.strip():
+                    yield line, orjson.loads(line)
         else:
             # JSON 형식: 전체 파일이 하나의 JSON (리스트 또는 객체)
-            data = json.load(f)
+            data = orjson.loads(f.read())
             if isinstance(data, list):
-                data_list = data
+                for item in data:
+                    yield None, item
             else:
-                data_list = [data]
-    
-    return data_list
+                yield None, data
+
+
+def load_data(json_path):
+    """JSON 또는 JSONL 파일을 리스트로 로드합니다."""
+    return [data for _, data in iter_data(json_path)]
+
 
+def build_file_index(root_folder):
+    """root_folder를 한 번 걸어서 존재하는 파일의 상대 경로 집합을 만듭니다.
 
-def check_missing_images(json_path, root_folder, output_file='missing_images.json'):
+    로컬 파일시스템에서는 레코드마다 stat 한 번(N번의 syscall)보다
+    디렉토리 전체를 한 번 걷고 O(1) 해시 조회를 하는 쪽이 훨씬 빠름.
     """
-    JSON 파일의 이미지 경로를 확인하고 존재하지 않는 이미지를 기록합니다.
+    existing = set()
+    for dirpath, _, filenames in os.walk(root_folder):
+        rel_dir = os.path.relpath(dirpath, root_folder)
+        if rel_dir == '.':
+            existing.update(filenames)
+        else:
+            for f in filenames:
+                existing.add(os.path.join(rel_dir, f))
+    return frozenset(existing)
+
+
+def check_missing_images(json_path, root_folder, output_file='missing_images.json',
+                         placeholder_output_file='missing_image_place.json',
+                         check_mode='walk', trust_list=False):
+    """
+    JSON 파일을 한 번만 스캔하면서 (1) 존재하지 않는 이미지와
+    (2) <image> 플레이스홀더 누락 항목을 동시에 기록합니다.
     
     Args:
         json_path: JSON 또는 JSONL 파일 경로
         root_folder: 이미지 파일들의 루트 폴더 경로
         output_file: 누락된 이미지가 포함된 라인 전체를 저장할 JSON 파일
+        placeholder_output_file: <image> 플레이스홀더 누락 라인을 저장할 JSON 파일
+        check_mode: 'walk'는 루트를 한 번 걷어 인덱스 set을 만들고 (로컬 FS 기본),
+                    'stat'은 레코드별 병렬 stat (JSONL이 루트의 일부만 다룰 때)
+        trust_list: True면 존재 확인을 아예 생략 — JSONL이 방금 파일 목록에서
+                    생성됐다면 stat/walk는 순수 낭비. 플레이스홀더 검사만 수행
     """
-    print(f"JSON 파일 로딩 중: {json_path}")
-    datas = load_data(json_path)
-    print(f"총 {len(datas)}개의 데이터 항목을 찾았습니다.")
-    
+    print(f"JSON 파일 확인 중: {json_path}")
+
+    existing = None
+    if trust_list:
+        print("파일 목록을 신뢰 — 존재 확인 생략 (<image> 플레이스홀더만 검사)")
+    elif check_mode == 'walk':
+        print(f"파일 인덱스 생성 중: {root_folder}")
+        existing = build_file_index(root_folder)
+        print(f"  인덱스된 파일: {len(existing):,}개")
+
     missing_lines = []
+    missing_placeholder_lines = []
     no_image_key_count = 0
-    
-    # tqdm으로 진행 상황 표시
-    for data in tqdm(datas, desc="이미지 확인 중", unit="개"):
-        if 'image' not in data and 'video' not in data:
-            no_image_key_count += 1
-            continue
-        
-        # 수정 코드
-        if 'image' in data:
-            media_path = data['image']
-        elif 'video' in data:
-            media_path = data['video']
-
-        full_media_path = os.path.join(root_folder, media_path)
-
-        if not os.path.exists(full_media_path):
-            missing_lines.append(json.dumps(data, ensure_ascii=False))
+    total = 0
+
+    # 스트리밍 배치 단위로 경로를 모아 stat을 스레드 풀에서 병렬 수행
+    it = iter_data(json_path)
+    with ThreadPoolExecutor(max_workers=STAT_WORKERS) as executor, \
+         tqdm(desc="이미지 확인 중", unit="개") as pbar:
+        while True:
+            batch = list(islice(it, STAT_BATCH))
+            if not batch:
+                break
+
+            checks = []  # (원본 라인 bytes, full_media_path)
+            for raw, data in batch:
+                total += 1
+                if 'image' not in data and 'video' not in data:
+                    no_image_key_count += 1
+                    continue
+
+                # 수정 코드
+                if 'image' in data:
+                    media_path = data['image']
+                elif 'video' in data:
+                    media_path = data['video']
+
+                # 레코드를 수정하지 않으므로 출력은 입력 bytes를 그대로 사용
+                line = raw.rstrip(b'\r\n') if raw is not None else orjson.dumps(data)
+                checks.append((line, media_path))
+
+                # 같은 패스에서 <image> 플레이스홀더도 확인 — 파일을 두 번
+                # 읽고 두 번 파싱하던 비용을 절반으로
+                if 'conversations' in data and len(data['conversations']) > 0:
+                    first_conv = data['conversations'][0]
+                    if 'value' in first_conv and '<image>' not in first_conv['value']:
+                        missing_placeholder_lines.append(line)
+
+            if trust_list:
+                exists_results = ()
+            elif existing is not None:
+                exists_results = (
+                    os.path.normpath(m) in existing for _, m in checks
+                )
+            else:
+                exists_results = executor.map(
+                    os.path.exists,
+                    (os.path.join(root_folder, m) for _, m in checks),
+                    chunksize=256,
+                )
+            for (line, _), exists in zip(checks, exists_results):
+                if not exists:
+                    missing_lines.append(line)
+
+            pbar.update(len(batch))
     
     # 결과 저장
     if missing_lines:
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with open(output_file, 'wb', buffering=BUF_SIZE) as f:
             for line in missing_lines:
-                f.write(f"{line}\n")
-        
+                f.write(line + b'\n')
+
         print(f"\n총 {len(missing_lines)}개의 이미지가 누락되었습니다.")
         print(f"누락된 이미지가 포함된 라인들이 '{output_file}'에 저장되었습니다.")
     else:
         print("\n모든 이미지 파일이 존재합니다! ✓")
     
     # 통계 출력
-    total = len(datas)
     found = total - len(missing_lines) - no_image_key_count
     print(f"\n=== 결과 요약 ===")
     print(f"전체 항목: {total}개")
@@ -111,48 +195,14 @@ def check_missing_images(json_path, root_folder, output_file='missing_images.jso
     if no_image_key_count > 0:
         print(f"경고! 이미지 파일 없음 ('image' 키 없음): {no_image_key_count}개")
 
-
-def check_missing_image_placeholder(json_path, output_file='missing_image_place.json'):
-    """
-    이미지가 있는데 대화에 <image> 플레이스홀더가 없는 항목을 찾습니다.
-    
-    Args:
-        json_path: JSON 또는 JSONL 파일 경로
-        output_file: <image> 플레이스홀더가 누락된 라인을 저장할 JSON 파일
-    """
-    print(f"\n<image> 플레이스홀더 확인 중...")
-    datas = load_data(json_path)
-    
-    missing_placeholder_lines = []
-    
-    for data in tqdm(datas, desc="<image> 플레이스홀더 확인 중", unit="개"):
-        text_only = False
-        
-        # 'image' 키가 없으면 text_only
-        if 'image' not in data and 'video' not in data:
-            text_only = True
-        
-        # text_only가 False인 경우만 체크 (이미지가 있는 경우)
-        if not text_only:
-            # conversations 확인
-            if 'conversations' in data and len(data['conversations']) > 0:
-                # 첫 번째 대화의 value 가져오기
-                first_conv = data['conversations'][0]
-                if 'value' in first_conv:
-                    human_query = first_conv['value']
-                    
-                    # <image> 플레이스홀더가 없는 경우
-                    if '<image>' not in human_query:
-                        missing_placeholder_lines.append(json.dumps(data, ensure_ascii=False))
-    
-    # 결과 저장
+    # <image> 플레이스홀더 결과 저장
     if missing_placeholder_lines:
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with open(placeholder_output_file, 'wb', buffering=BUF_SIZE) as f:
             for line in missing_placeholder_lines:
-                f.write(f"{line}\n")
-        
+                f.write(line + b'\n')
+
         print(f"\n총 {len(missing_placeholder_lines)}개의 항목에서 <image> 플레이스홀더가 누락되었습니다.")
-        print(f"누락된 항목들이 '{output_file}'에 저장되었습니다.")
+        print(f"누락된 항목들이 '{placeholder_output_file}'에 저장되었습니다.")
     else:
         print("\n모든 이미지 항목에 <image> 플레이스홀더가 포함되어 있습니다! ✓")
 
@@ -183,6 +233,21 @@ def main():
         help='누락된 이미지가 포함된 전체 라인을 저장할 파일명 (기본값: missing_images.json)'
     )
 
+    parser.add_argument(
+        '--check-mode',
+        choices=['walk', 'stat'],
+        default='walk',
+        help="존재 확인 방식: walk=루트를 한 번 스캔해 set 조회 (기본), "
+             "stat=레코드별 병렬 stat (JSONL이 루트의 극히 일부만 다룰 때)"
+    )
+
+    parser.add_argument(
+        '--trust-list',
+        action='store_true',
+        help='존재 확인(stat/walk)을 건너뜀 — 원격 마운트에서 isfile은 느리고 '
+             '신뢰도도 낮으므로, JSONL이 방금 파일 목록에서 생성된 경우 사용'
+    )
+
     parser.add_argument(
         '--output2',
         type=str,
@@ -201,11 +266,10 @@ def main():
         print(f"오류: 루트 폴더를 찾을 수 없습니다: {args.root_folder}")
         return
     
-    # 메인 실행
-    check_missing_images(args.json_path, args.root_folder, args.output)
-    
-    # <image> 플레이스홀더 확인
-    check_missing_image_placeholder(args.json_path, args.output2)
+    # 메인 실행 — 누락 이미지와 <image> 플레이스홀더를 한 패스로 확인
+    check_missing_images(args.json_path, args.root_folder, args.output,
+                         args.output2, check_mode=args.check_mode,
+                         trust_list=args.trust_list)
 
 
 if __name__ == "__main__":
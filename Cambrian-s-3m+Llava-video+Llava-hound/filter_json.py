@@ -20,55 +20,87 @@ JSON 파일에서 누락된 이미지와 특정 경로의 데이터를 제거하
 """
 
 import argparse
-import json
+import mmap
 import os
+import re
+
+import orjson
 from tqdm import tqdm
 
+# 기본 8 KB 버퍼 대신 큰 블록으로 써서 syscall 수를 줄임
+BUF_SIZE = 4 * 1024 * 1024  # 4 MiB
 
-def load_data(json_path):
-    """JSON 또는 JSONL 파일을 로드합니다."""
-    data_list = []
-    
-    with open(json_path, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-        
-        if not content:
-            return data_list
-        
-        # 먼저 일반 JSON으로 파싱 시도
-        try:
-            data = json.loads(content)
+
+def iter_data(json_path):
+    """JSON 또는 JSONL 파일에서 (원본 라인 bytes, 파싱된 레코드)를 생성합니다.
+
+    기존처럼 f.read() 후 split하면 멀티 GB 파일에서 피크 메모리가
+    파일 크기의 2~3배까지 올라감 — 한 줄씩 파싱해서 바로 내보냄.
+    원본 bytes를 같이 돌려주므로 레코드를 수정하지 않는 소비자는
+    재직렬화 없이 그대로 기록할 수 있음 (JSON 배열 입력이면 None).
+    """
+    # 바이너리 모드 + orjson: UTF-8 디코딩 없이 bytes를 바로 파싱
+    with open(json_path, 'rb') as f:
+        if not json_path.endswith('.jsonl'):
+            # JSON 형식: 전체 파일이 하나의 JSON (리스트 또는 객체).
+            # 단, 확장자가 .json이어도 내용은 JSONL일 수 있음 —
+            # check_missing_images.py의 기본 출력(missing_images.json)이
+            # 그렇게 생김. 전체 파싱이 실패하면 라인 단위로 폴백
+            raw = f.read()
+            if not raw.strip():
+                return
+            try:
+                data = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                for line in raw.splitlines():
+                    if line.strip():
+                        try:
+                            yield line, orjson.loads(line)
+                        except orjson.JSONDecodeError as e:
+                            print(f"경고: 라인 파싱 실패: {line[:100]}... - {e}")
+                return
             if isinstance(data, list):
-                data_list = data
+                for item in data:
+                    yield None, item
             else:
-                data_list = [data]
-        except json.JSONDecodeError:
-            # JSON 파싱 실패 시 JSONL로 처리
-            for line in content.split('\n'):
-                line = line.strip()
-                if line:
+                yield None, data
+            return
+
+        if os.path.getsize(json_path) == 0:
+            return
+
+        # JSONL 형식: mmap으로 페이지 캐시에서 바로 읽음 — read() 복사본이
+        # 없고, MADV_SEQUENTIAL 힌트로 커널이 읽기 지점 뒤 페이지를 회수함
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            for line in iter(mm.readline, b''):
+                if line.strip():
                     try:
-                        data_list.append(json.loads(line))
-                    except json.JSONDecodeError as e:
+                        yield line, orjson.loads(line)
+                    except orjson.JSONDecodeError as e:
                         print(f"경고: 라인 파싱 실패: {line[:100]}... - {e}")
                         continue
-    
-    return data_list
+
+
+def load_data(json_path):
+    """JSON 또는 JSONL 파일을 리스트로 로드합니다."""
+    return [data for _, data in iter_data(json_path)]
 
 
 def create_missing_image_set(missing_json_path):
     """missing.json 파일에서 누락된 이미지 경로 집합을 생성합니다."""
-    missing_data = load_data(missing_json_path)
     missing_images = set()
-    
-    for data in missing_data:
+
+    for _, data in iter_data(missing_json_path):
         if 'image' in data:
             missing_images.add(data['image'])
         elif 'video' in data:
             missing_images.add(data['video'])
-    
+
     print(f"누락된 이미지 {len(missing_images)}개를 로드했습니다.")
-    return missing_images
+    # frozenset: 이후 수정되지 않는 읽기 전용 조회 전용 집합
+    return frozenset(missing_images)
 
 
 def filter_json(origin_json_path, missing_json_path, delete_keys, output_file='filtered_data.json'):
@@ -81,68 +113,81 @@ def filter_json(origin_json_path, missing_json_path, delete_keys, output_file='f
         delete_keys: 삭제할 경로 키워드 리스트
         output_file: 필터링된 결과를 저장할 파일
     """
-    print(f"원본 JSON 파일 로딩 중: {origin_json_path}")
-    origin_data = load_data(origin_json_path)
-    print(f"총 {len(origin_data)}개의 원본 데이터 항목을 로드했습니다.")
-    
+    print(f"원본 JSON 파일 필터링 중: {origin_json_path}")
+
     # 누락된 이미지 집합 생성
     missing_images = create_missing_image_set(missing_json_path)
-    
+
     # 삭제할 키워드 파싱
     delete_key_list = [key.strip() for key in delete_keys.split(',') if key.strip()]
     print(f"삭제할 경로 키워드: {delete_key_list}")
-    
-    # 필터링
-    filtered_data = []
+
+    # 레코드마다 키워드 수만큼 파이썬 루프를 도는 대신, 한 번 컴파일한
+    # 대안(|) 패턴으로 경로를 C 레벨에서 한 번에 스캔
+    delete_re = re.compile('|'.join(map(re.escape, delete_key_list))) if delete_key_list else None
+
+    # 출력 형식은 출력 파일 확장자로 결정
+    # JSONL이면 스트리밍으로 바로 기록해 원본 전체를 메모리에 올리지 않음
+    is_jsonl = output_file.endswith('.jsonl')
+
+    total = 0
+    kept = 0
     removed_by_missing = 0
     removed_by_delete_keys = 0
-    
-    for data in tqdm(origin_data, desc="데이터 필터링 중", unit="개"):
-        # 수정
-        if 'image' not in data and 'video' not in data:그대로 유지
-            filtered_data.append(data)
-            continue
-        
-        media_path = data.get('image') or data.get('video')
-        
-        # 1. 누락된 이미지인지 확인
-        if media_path in missing_images:
-            removed_by_missing += 1
-            continue
-
-        # 2. delete_keys에 해당하는 경로인지 확인
-        should_delete = False
-        for delete_key in delete_key_list:
-            if delete_key in media_path:
-                should_delete = True
+    filtered_data = []  # JSON(배열) 출력일 때만 사용
+
+    with open(output_file, 'wb', buffering=BUF_SIZE) as fout:
+
+        def emit(raw, data):
+            if is_jsonl:
+                if raw is not None:
+                    # 레코드를 수정하지 않으므로 재직렬화 없이 입력 라인 그대로 기록
+                    fout.write(raw.rstrip(b'\r\n') + b'\n')
+                else:
+                    # orjson은 UTF-8 bytes를 바로 돌려줌 — encode 단계 없음
+                    fout.write(orjson.dumps(data) + b'\n')
+            else:
+                filtered_data.append(data)
+
+        # 루프 안에서 매번 하는 attribute lookup을 지역 변수로 묶음
+        in_missing = missing_images.__contains__
+        delete_search = delete_re.search if delete_re is not None else None
+
+        for raw, data in tqdm(iter_data(origin_json_path), desc="데이터 필터링 중", unit="개"):
+            total += 1
+
+            if 'image' not in data and 'video' not in data:  # 그대로 유지
+                emit(raw, data)
+                kept += 1
+                continue
+
+            media_path = data.get('image') or data.get('video')
+
+            # 1. 누락된 이미지인지 확인
+            if in_missing(media_path):
+                removed_by_missing += 1
+                continue
+
+            # 2. delete_keys에 해당하는 경로인지 확인
+            if delete_search is not None and delete_search(media_path):
                 removed_by_delete_keys += 1
-                break
-        
-        if should_delete:
-            continue
-        
-        # 필터를 통과한 데이터 추가
-        filtered_data.append(data)
-    
-    # 결과 저장 - 출력 파일 확장자로 형식 결정
-    is_jsonl = output_file.endswith('.jsonl')
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        if is_jsonl:
-            # JSONL 형식으로 저장
-            for data in filtered_data:
-                f.write(json.dumps(data, ensure_ascii=False) + '\n')
-        else:
+                continue
+
+            # 필터를 통과한 데이터 추가
+            emit(raw, data)
+            kept += 1
+
+        if not is_jsonl:
             # JSON 형식으로 저장
-            json.dump(filtered_data, f, ensure_ascii=False, indent=2)
-    
+            fout.write(orjson.dumps(filtered_data, option=orjson.OPT_INDENT_2))
+
     # 통계 출력
     print(f"\n=== 필터링 결과 ===")
-    print(f"원본 데이터: {len(origin_data)}개")
+    print(f"원본 데이터: {total}개")
     print(f"누락된 이미지로 제거: {removed_by_missing}개")
     print(f"특정 경로로 제거: {removed_by_delete_keys}개")
-    print(f"최종 데이터: {len(filtered_data)}개")
-    print(f"제거된 총 데이터: {len(origin_data) - len(filtered_data)}개")
+    print(f"최종 데이터: {kept}개")
+    print(f"제거된 총 데이터: {total - kept}개")
     print(f"\n필터링된 데이터가 '{output_file}'에 저장되었습니다.")
 
 
@@ -8,40 +8,81 @@ import os
 from pathlib import Path
 from collections import defaultdict
 
-# Video file extensions to check
-VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm', '.m4v', '.mpg', '.mpeg'}
+# Video file extensions to check (점 없이 저장 — rfind로 뽑은 꼬리와 바로 비교)
+VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'flv', 'wmv', 'webm', 'm4v', 'mpg', 'mpeg'}
 
 # Image file extensions
-IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'bmp', 'gif', 'tiff', 'webp'}
 
+# str.endswith는 튜플 인자를 C 레벨에서 한 번에 비교 — 파일마다
+# 확장자를 잘라 set에 넣고 교집합을 구하는 것보다 빠름
+VIDEO_SUFFIXES = tuple('.' + e for e in VIDEO_EXTENSIONS)
+IMAGE_SUFFIXES = tuple('.' + e for e in IMAGE_EXTENSIONS)
 
-def has_video_files(directory):
-    """Check if directory or its subdirectories contain any video files."""
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if Path(file).suffix.lower() in VIDEO_EXTENSIONS:
-                return True
-    return False
 
+def iter_dirs(top):
+    """Yield (dir_path, filenames) for top and every subdirectory.
 
-def get_video_formats(directory):
-    """Get set of video formats found in directory and subdirectories."""
-    formats = set()
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext in VIDEO_EXTENSIONS:
-                formats.add(ext)
-    return formats
-
-
-def has_image_files(directory):
-    """Check if directory contains any image files."""
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if Path(file).suffix.lower() in IMAGE_EXTENSIONS:
-                return True
-    return False
+    os.walk 대신 os.scandir 직접 사용: getdents가 돌려주는 d_type으로
+    파일/디렉토리를 구분하므로 항목마다 lstat를 추가로 부르지 않음
+    (NFS에서 특히 체감). 읽을 수 없는 디렉토리는 os.walk처럼 조용히 스킵.
+    """
+    stack = [top]
+    while stack:
+        d = stack.pop()
+        files = []
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    else:
+                        files.append(e.name)
+        except OSError:
+            continue
+        yield d, files
+
+
+def scan_tree(dataset_dir):
+    """Walk the dataset once, recording per-directory video/image extensions.
+
+    한 번의 스캔 결과를 dict로 들고 있으면 이후의 모든 질문
+    (영상 포맷, 하위 트리에 영상/이미지 존재 여부)을 재탐색 없이
+    답할 수 있음 — 디렉토리당 walk 3번 + 서브디렉토리 재귀 walk가 사라짐.
+    Returns {dir_path: (video_exts, has_image)}.
+    """
+    info = {}
+    for root, files in iter_dirs(dataset_dir):
+        # 분류는 endswith(튜플) 한 번 — 영상일 때만 포맷 이름을 잘라냄
+        vids = set()
+        has_image = False
+        for f in files:
+            fl = f.lower()
+            if fl.endswith(VIDEO_SUFFIXES):
+                vids.add(fl[fl.rfind('.') + 1:])
+            elif not has_image and fl.endswith(IMAGE_SUFFIXES):
+                has_image = True
+        info[root] = (vids, has_image)
+    return info
+
+
+def propagate_subtree(info):
+    """Fold per-directory flags bottom-up into subtree flags.
+
+    깊은 디렉토리부터 부모로 or-전파하면 "하위 트리 어딘가에
+    영상/이미지가 있나"가 dict 조회 한 번이 됨 — 디렉토리마다
+    info 전체를 prefix 스캔하던 O(N²)을 O(N) 한 패스로 대체.
+    Returns {dir_path: (subtree_has_video, subtree_has_image)}.
+    """
+    sub = {d: (bool(vids), bool(img)) for d, (vids, img) in info.items()}
+    for d in sorted(sub, key=lambda p: p.count(os.sep), reverse=True):
+        parent = os.path.dirname(d)
+        if parent in sub:
+            pv, pi = sub[parent]
+            v, i = sub[d]
+            if (v and not pv) or (i and not pi):
+                sub[parent] = (pv or v, pi or i)
+    return sub
 
 
 def find_image_only_directories(root_path):
@@ -59,34 +100,34 @@ def find_image_only_directories(root_path):
         dataset_name = dataset_dir.name
         print(f"\n검사 중: {dataset_name}")
         
-        # Check if the dataset directory itself has videos
-        video_formats = get_video_formats(dataset_dir)
+        # 데이터셋 전체를 단 한 번만 walk — 이후 질문은 전부 dict 조회
+        info = scan_tree(str(dataset_dir))
+        sub = propagate_subtree(info)
+        video_formats = set().union(*(vid for vid, _ in info.values()))
         
         if video_formats:
-            # Format the extensions nicely (remove dots)
-            format_str = ", ".join(sorted([fmt.lstrip('.') for fmt in video_formats]))
+            # Format the extensions nicely
+            format_str = ", ".join(sorted(video_formats))
             print(f"  ├─ 영상 파일 발견됨 ({format_str})")
             
             # If it has videos, find subdirectories that don't have videos
-            for root, dirs, files in os.walk(dataset_dir):
-                root_path_obj = Path(root)
-                
+            # 상대 경로는 Path.relative_to 대신 문자열 prefix 제거로 계산
+            prefix = str(dataset_dir.parent) + os.sep
+            for root, (video_exts, _) in info.items():
                 # Skip if current directory has video files
-                current_has_video = any(
-                    Path(f).suffix.lower() in VIDEO_EXTENSIONS 
-                    for f in files
-                )
+                if video_exts:
+                    continue
                 
-                if not current_has_video:
-                    # Check if this directory or subdirectories have videos
-                    if not has_video_files(root_path_obj) and has_image_files(root_path_obj):
-                        # Get relative path from dataset root
-                        rel_path = root_path_obj.relative_to(dataset_dir.parent)
-                        results[dataset_name].append(str(rel_path))
-                        print(f"  ├─ 이미지만 발견: {rel_path}")
+                # Check if this directory or subdirectories have videos
+                sub_video, sub_image = sub[root]
+                if not sub_video and sub_image:
+                    # Get relative path from dataset root
+                    rel_path = root.removeprefix(prefix)
+                    results[dataset_name].append(rel_path)
+                    print(f"  ├─ 이미지만 발견: {rel_path}")
         else:
             # No videos in entire dataset
-            if has_image_files(dataset_dir):
+            if any(img for _, img in info.values()):
                 # Dataset has only images
                 results[dataset_name].append(f"{dataset_name} (전체 디렉토리)")
                 print(f"  └─ ✓ 영상 없음 - 이미지만 존재")
@@ -97,58 +138,40 @@ def find_image_only_directories(root_path):
     return results
 
 
-class Logger:
-    """Simple logger that prints to console and writes to file."""
-    def __init__(self, filename):
-        self.terminal = __import__('sys').stdout
-        self.log = open(filename, 'w', encoding='utf-8')
-    
-    def write(self, message):
-        self.terminal.write(message)
-        self.log.write(message)
-    
-    def flush(self):
-        self.terminal.flush()
-        self.log.flush()
-    
-    def close(self):
-        self.log.close()
+def write_results(results, output_file):
+    """Write the collected results to a file in one buffered pass."""
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        for dataset_name, dirs in results.items():
+            f.write(f"[{dataset_name}]\n")
+            for d in dirs:
+                f.write(f"  {d}\n")
+            f.write("\n")
 
 
 def main():
-    import sys
-    
     # 데이터셋 루트 경로 설정
     dataset_root = "/mnt/ddn/datasets/cambrian_s_3m"
     output_file = "/mnt/ddn/datasets/cambrian_s_3m/image_only_results.txt"
     
-    # Create logger that prints and saves to file
-    logger = Logger(output_file)
-    sys.stdout = logger
+    # 경로가 존재하는지 확인
+    if not os.path.exists(dataset_root):
+        print(f"❌ 경로가 존재하지 않습니다: {dataset_root}")
+        print("경로를 확인하고 다시 시도해주세요.")
+        return
     
-    try:
-        # 경로가 존재하는지 확인
-        if not os.path.exists(dataset_root):
-            print(f"❌ 경로가 존재하지 않습니다: {dataset_root}")
-            print("경로를 확인하고 다시 시도해주세요.")
-            return
-        
-        print(f"데이터셋 루트: {dataset_root}")
-        print(f"결과 저장 위치: {output_file}")
-        print("=" * 80)
-        
-        # 이미지 전용 디렉토리 찾기
-        results = find_image_only_directories(dataset_root)
-        
-        print("\n" + "=" * 80)
-        print("완료!")
-        print(f"총 {len(results)}개의 데이터셋 검사됨")
-        
-    finally:
-        # Restore stdout and close log file
-        sys.stdout = logger.terminal
-        logger.close()
-        print(f"\n결과가 저장되었습니다: {output_file}")
+    print(f"데이터셋 루트: {dataset_root}")
+    print(f"결과 저장 위치: {output_file}")
+    print("=" * 80)
+    
+    # 이미지 전용 디렉토리 찾기 — 콘솔 출력은 print 그대로, 결과 파일은
+    # stdout tee 없이 마지막에 한 번 버퍼링해서 기록
+    results = find_image_only_directories(dataset_root)
+    write_results(results, output_file)
+    
+    print("\n" + "=" * 80)
+    print("완료!")
+    print(f"총 {len(results)}개의 데이터셋 검사됨")
+    print(f"\n결과가 저장되었습니다: {output_file}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+check_missing_images.py + filter_json.py를 한 패스로 합친 파이프라인
+
+기존 흐름은 check_missing_images.py가 missing JSONL을 만들고,
+filter_json.py가 원본 + missing을 다시 읽어 필터링했음 — 원본을
+두 번 파싱하고 missing을 디스크로 왕복. 이 스크립트는 원본을 한 번만
+스트리밍하면서
+  1) 미디어 파일 존재 확인        → --missing_output
+  2) delete_keys 경로 필터        → 제거 (filtered에서 제외)
+  3) <image> 플레이스홀더 검사    → --placeholder_output
+  4) 필터를 통과한 레코드          → --filtered_output
+를 동시에 수행합니다.
+
+python process.py \
+  --json_path ./cambrian_s_3m.jsonl \
+  --root_folder ./ \
+  --delete_keys "llava_pretrain,sbu558k" \
+  --filtered_output cambrian_s_3m_filtered.jsonl \
+  --missing_output missing_Cambrian-S.jsonl \
+  --placeholder_output missing_image_place_Cambrian-S.jsonl
+"""
+
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import orjson
+from tqdm import tqdm
+
+# stat은 (특히 NFS/FUSE에서) 블로킹 왕복 — 스레드로 겹치면 거의 선형으로 빨라짐
+STAT_WORKERS = 16
+STAT_BATCH = 4096
+
+# 기본 8 KB 버퍼 대신 큰 블록으로 써서 syscall 수를 줄임
+BUF_SIZE = 4 * 1024 * 1024  # 4 MiB
+
+
+def iter_data(json_path):
+    """JSON 또는 JSONL 파일에서 (원본 라인 bytes, 파싱된 레코드)를 생성합니다.
+
+    원본 bytes를 같이 돌려주므로 레코드를 수정하지 않는 소비자는
+    재직렬화 없이 그대로 기록할 수 있음 (JSON 배열 입력이면 None).
+    """
+    # 바이너리 모드 + orjson: UTF-8 디코딩 없이 bytes를 바로 파싱
+    with open(json_path, 'rb') as f:
+        if json_path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield line, orjson.loads(line)
+        else:
+            data = orjson.loads(f.read())
+            if isinstance(data, list):
+                for item in data:
+                    yield None, item
+            else:
+                yield None, data
+
+
+def build_file_index(root_folder):
+    """root_folder를 한 번 걸어서 존재하는 파일의 상대 경로 집합을 만듭니다."""
+    existing = set()
+    for dirpath, _, filenames in os.walk(root_folder):
+        rel_dir = os.path.relpath(dirpath, root_folder)
+        if rel_dir == '.':
+            existing.update(filenames)
+        else:
+            for f in filenames:
+                existing.add(os.path.join(rel_dir, f))
+    return frozenset(existing)
+
+
+def process(json_path, root_folder, delete_keys,
+            filtered_output, missing_output, placeholder_output,
+            check_mode='walk'):
+    """원본을 한 번 스트리밍하면서 필터링 + 누락/플레이스홀더 기록."""
+    print(f"원본 파일 처리 중: {json_path}")
+
+    # 삭제할 키워드 파싱 — 한 번 컴파일한 대안(|) 패턴으로 C 레벨 스캔
+    delete_key_list = [key.strip() for key in delete_keys.split(',') if key.strip()]
+    print(f"삭제할 경로 키워드: {delete_key_list}")
+    delete_re = re.compile('|'.join(map(re.escape, delete_key_list))) if delete_key_list else None
+    delete_search = delete_re.search if delete_re is not None else None
+
+    existing = None
+    if check_mode == 'walk':
+        print(f"파일 인덱스 생성 중: {root_folder}")
+        existing = build_file_index(root_folder)
+        print(f"  인덱스된 파일: {len(existing):,}개")
+
+    total = 0
+    kept = 0
+    removed_by_missing = 0
+    removed_by_delete_keys = 0
+    missing_placeholder_count = 0
+    no_media_key_count = 0
+
+    it = iter_data(json_path)
+    with open(filtered_output, 'wb', buffering=BUF_SIZE) as f_filtered, \
+         open(missing_output, 'wb', buffering=BUF_SIZE) as f_missing, \
+         open(placeholder_output, 'wb', buffering=BUF_SIZE) as f_placeholder, \
+         ThreadPoolExecutor(max_workers=STAT_WORKERS) as executor, \
+         tqdm(desc="처리 중", unit="개") as pbar:
+
+        def emit_line(fout, raw, data):
+            # 레코드를 수정하지 않으므로 원본 bytes를 그대로 기록
+            if raw is not None:
+                fout.write(raw.rstrip(b'\r\n') + b'\n')
+            else:
+                fout.write(orjson.dumps(data) + b'\n')
+
+        while True:
+            batch = list(islice(it, STAT_BATCH))
+            if not batch:
+                break
+
+            checks = []  # (raw, data, full_media_path)
+            for raw, data in batch:
+                total += 1
+
+                # 텍스트 전용 레코드는 그대로 유지
+                if 'image' not in data and 'video' not in data:
+                    no_media_key_count += 1
+                    emit_line(f_filtered, raw, data)
+                    kept += 1
+                    continue
+
+                media_path = data.get('image') or data.get('video')
+
+                # 같은 패스에서 <image> 플레이스홀더도 확인
+                if 'conversations' in data and len(data['conversations']) > 0:
+                    first_conv = data['conversations'][0]
+                    if 'value' in first_conv and '<image>' not in first_conv['value']:
+                        emit_line(f_placeholder, raw, data)
+                        missing_placeholder_count += 1
+
+                # delete_keys에 해당하는 경로는 존재 확인 전에 바로 제거
+                if delete_search is not None and delete_search(media_path):
+                    removed_by_delete_keys += 1
+                    continue
+
+                checks.append((raw, data, media_path))
+
+            if existing is not None:
+                exists_results = (
+                    os.path.normpath(m) in existing for _, _, m in checks
+                )
+            else:
+                exists_results = executor.map(
+                    os.path.exists,
+                    (os.path.join(root_folder, m) for _, _, m in checks),
+                    chunksize=256,
+                )
+            for (raw, data, _), exists in zip(checks, exists_results):
+                if exists:
+                    emit_line(f_filtered, raw, data)
+                    kept += 1
+                else:
+                    emit_line(f_missing, raw, data)
+                    removed_by_missing += 1
+
+            pbar.update(len(batch))
+
+    # 통계 출력
+    print(f"\n=== 처리 결과 ===")
+    print(f"원본 데이터: {total}개")
+    print(f"누락된 이미지로 제거: {removed_by_missing}개")
+    print(f"특정 경로로 제거: {removed_by_delete_keys}개")
+    print(f"<image> 플레이스홀더 누락: {missing_placeholder_count}개")
+    print(f"최종 데이터: {kept}개 (텍스트 전용 {no_media_key_count}개 포함)")
+    print(f"\n필터링된 데이터: '{filtered_output}'")
+    print(f"누락 레코드: '{missing_output}'")
+    print(f"플레이스홀더 누락 레코드: '{placeholder_output}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="원본 JSONL을 한 번만 읽으면서 존재 확인 + 경로 필터 + "
+                    "<image> 플레이스홀더 검사를 동시에 수행합니다."
+    )
+
+    parser.add_argument(
+        '--json_path',
+        type=str,
+        required=True,
+        help='원본 JSON 또는 JSONL 파일 경로'
+    )
+
+    parser.add_argument(
+        '--root_folder',
+        type=str,
+        required=True,
+        help='이미지/비디오 파일들의 루트 폴더 경로'
+    )
+
+    parser.add_argument(
+        '--delete_keys',
+        type=str,
+        default='',
+        help='삭제할 경로 키워드 (쉼표로 구분, 예: "llava_pretrain,sbu558k")'
+    )
+
+    parser.add_argument(
+        '--filtered_output',
+        type=str,
+        default='filtered_data.jsonl',
+        help='필터를 통과한 레코드를 저장할 JSONL 파일 (기본값: filtered_data.jsonl)'
+    )
+
+    parser.add_argument(
+        '--missing_output',
+        type=str,
+        default='missing_images.jsonl',
+        help='누락된 미디어 레코드를 저장할 JSONL 파일 (기본값: missing_images.jsonl)'
+    )
+
+    parser.add_argument(
+        '--placeholder_output',
+        type=str,
+        default='missing_image_place.jsonl',
+        help='<image> 플레이스홀더 누락 레코드를 저장할 JSONL 파일 '
+             '(기본값: missing_image_place.jsonl)'
+    )
+
+    parser.add_argument(
+        '--check-mode',
+        choices=['walk', 'stat'],
+        default='walk',
+        help="존재 확인 방식: walk=루트를 한 번 스캔해 set 조회 (기본), "
+             "stat=레코드별 병렬 stat (JSONL이 루트의 극히 일부만 다룰 때)"
+    )
+
+    args = parser.parse_args()
+
+    # 입력 검증
+    if not os.path.exists(args.json_path):
+        print(f"오류: JSON 파일을 찾을 수 없습니다: {args.json_path}")
+        return
+
+    if not os.path.exists(args.root_folder):
+        print(f"오류: 루트 폴더를 찾을 수 없습니다: {args.root_folder}")
+        return
+
+    process(args.json_path, args.root_folder, args.delete_keys,
+            args.filtered_output, args.missing_output, args.placeholder_output,
+            check_mode=args.check_mode)
+
+
+if __name__ == "__main__":
+    main()
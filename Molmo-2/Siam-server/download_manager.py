@@ -19,31 +19,54 @@ YouTube 비디오 다운로드 매니저
     python download_manager.py --status
 """
 
+import asyncio
 import json
 import os
 import subprocess
 import argparse
 import time
 import threading
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from datetime import datetime
 import signal
 
+# 멀티 MB짜리 매핑 JSON 로드가 stdlib 디코더에서는 수 초 — orjson이
+# 있으면 사용하고(3~6배), 없으면 stdlib로 동작
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # 설정
 FILES_PER_FOLDER = 100
+# yt-dlp 한 번 기동(파이썬 임포트 + extractor 초기화 + TLS 연결)이 짧은
+# 480p 클립에서는 다운로드 자체보다 비쌈 — URL을 묶어 호출당 1회로
+BATCH_SIZE = 25
+# 429/봇 확인이 뜬 직후의 대기 시간 (초)
+RATE_LIMIT_COOLDOWN = 30
 DEFAULT_TARGET_GB = 20
 OUTPUT_BASE_DIR = "molmo2-videos"
 LOG_DIR = "download_logs"
 
 # 로그 파일들
 PENDING_LOG = os.path.join(LOG_DIR, "pending_videos.txt")
+PENDING_REMOVED_LOG = os.path.join(LOG_DIR, "pending_removed.txt")
 COMPLETED_LOG = os.path.join(LOG_DIR, "completed_videos.txt")
 FAILED_LOG = os.path.join(LOG_DIR, "failed_videos.txt")
 FOLDER_MAPPING = os.path.join(LOG_DIR, "video_folder_mapping.json")
+FOLDER_MAPPING_JOURNAL = FOLDER_MAPPING + ".jsonl"
 DOWNLOAD_STATE = os.path.join(LOG_DIR, "download_state.json")
 
 
+def _atomic_write_json(path, obj):
+    """temp에 쓰고 os.replace로 교체 — 중간에 죽어도 파일이 깨지지 않음"""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp, path)
+
+
 def check_ytdlp():
     """yt-dlp 설치 확인"""
     result = subprocess.run(["which", "yt-dlp"], capture_output=True, text=True)
@@ -75,37 +98,78 @@ class FolderManager:
     def __init__(self, base_dir, files_per_folder=FILES_PER_FOLDER):
         self.base_dir = base_dir
         self.files_per_folder = files_per_folder
+        os.makedirs(LOG_DIR, exist_ok=True)
         self.mapping = self._load_mapping()
+        # 성공할 때마다 전체 dict를 indent=2로 다시 쓰는 대신 (O(N²) 쓰기),
+        # 한 줄짜리 JSONL journal에 append — close()에서 JSON으로 합침
+        self._journal_fp = open(FOLDER_MAPPING_JOURNAL, "a", buffering=1)
         self.lock = threading.Lock()
+        # 현재 폴더 상태 캐시 — 할당 때마다 batch_0000부터 listdir로
+        # 다시 세지 않고, 첫 사용 시 한 번 스캔 후 카운터만 증가
+        self._cur_idx = None
+        self._cur_name = None
+        self._cur_path = None
+        self._cur_count = 0
 
     def _load_mapping(self):
-        """video_id -> folder 매핑 로드"""
+        """video_id -> folder 매핑 로드 (JSON + 지난 실행의 journal)"""
+        mapping = {}
         if os.path.exists(FOLDER_MAPPING):
-            with open(FOLDER_MAPPING, "r") as f:
-                return json.load(f)
-        return {}
+            with open(FOLDER_MAPPING, "rb") as f:
+                mapping = _loads(f.read())
+        # close() 전에 죽었어도 journal에서 복원
+        if os.path.exists(FOLDER_MAPPING_JOURNAL):
+            with open(FOLDER_MAPPING_JOURNAL, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        entry = _loads(line)
+                        mapping[entry["vid"]] = entry["folder"]
+        return mapping
 
     def _save_mapping(self):
-        """매핑 저장"""
-        with open(FOLDER_MAPPING, "w") as f:
-            json.dump(self.mapping, f, indent=2)
-
-    def _get_current_folder_info(self):
-        """현재 폴더와 파일 수 확인"""
-        folder_idx = 0
-        while True:
-            folder_name = f"batch_{folder_idx:04d}"
-            folder_path = os.path.join(self.base_dir, folder_name)
-
-            if not os.path.exists(folder_path):
-                os.makedirs(folder_path, exist_ok=True)
-                return folder_name, folder_path, 0
+        """매핑 전체를 JSON으로 저장 (journal 합쳐서 한 번만)"""
+        _atomic_write_json(FOLDER_MAPPING, self.mapping)
 
-            file_count = len([f for f in os.listdir(folder_path) if f.endswith('.mp4')])
-            if file_count < self.files_per_folder:
-                return folder_name, folder_path, file_count
+    def close(self):
+        """journal을 JSON으로 합치고 비움"""
+        with self.lock:
+            self._save_mapping()
+            self._journal_fp.truncate(0)
+
+    @staticmethod
+    def _scan_folder_count(folder_path, limit=None):
+        """폴더의 mp4 수 (scandir — listdir+리스트 생성보다 가벼움)
+
+        limit이 있으면 도달 즉시 멈춤 — '가득 찼는가'만 보면 되는
+        폴더에서 나머지 엔트리를 끝까지 셀 이유가 없음.
+        """
+        count = 0
+        with os.scandir(folder_path) as it:
+            for e in it:
+                if e.name.endswith('.mp4') and e.is_file(follow_symlinks=False):
+                    count += 1
+                    if limit is not None and count >= limit:
+                        break
+        return count
+
+    def _set_folder(self, folder_idx):
+        """폴더 상태 캐시를 folder_idx로 설정 (필요 시 생성/스캔)"""
+        self._cur_idx = folder_idx
+        self._cur_name = f"batch_{folder_idx:04d}"
+        self._cur_path = os.path.join(self.base_dir, self._cur_name)
+        if os.path.exists(self._cur_path):
+            self._cur_count = self._scan_folder_count(self._cur_path,
+                                                       self.files_per_folder)
+        else:
+            os.makedirs(self._cur_path, exist_ok=True)
+            self._cur_count = 0
 
-            folder_idx += 1
+    def _ensure_folder_state(self, need=1):
+        """need개가 들어갈 현재 폴더 보장 — 부트스트랩은 최초 1회만 디스크 스캔"""
+        if self._cur_path is None:
+            self._set_folder(0)
+        while self._cur_count + need > self.files_per_folder:
+            self._set_folder(self._cur_idx + 1)
 
     def get_output_path(self, video_id):
         """video_id에 대한 출력 경로 반환 (매핑은 성공 후에만 저장)"""
@@ -118,16 +182,43 @@ class FolderManager:
                 if os.path.exists(file_path):
                     return file_path, folder_name
 
-            # 새 위치 할당 (아직 매핑에 저장하지 않음)
-            folder_name, folder_path, _ = self._get_current_folder_info()
-            return os.path.join(folder_path, f"{video_id}.mp4"), folder_name
+            # 새 위치 할당 + 슬롯 1개 예약
+            self._ensure_folder_state()
+            self._cur_count += 1
+            return os.path.join(self._cur_path, f"{video_id}.mp4"), self._cur_name
+
+    def get_batch_output_dir(self, need):
+        """배치 하나가 통째로 들어갈 폴더 반환 (슬롯 부족 시 다음 폴더)
+
+        need개 슬롯을 할당 시점에 예약함 — 확정(confirm) 때만 세면
+        동시에 떠 있는 배치들이 전부 같은 폴더를 배정받아
+        files_per_folder를 훌쩍 넘길 수 있음. 실패/미확정분은
+        release_slots()로 돌려줌.
+        """
+        with self.lock:
+            self._ensure_folder_state(need)
+            self._cur_count += need
+            return self._cur_path, self._cur_name
+
+    def release_slots(self, folder_name, n):
+        """배치에서 파일이 안 생긴 슬롯(실패/타임아웃/보류)을 반납.
+
+        폴더가 이미 다음으로 넘어갔으면 그냥 둠 — 그 폴더는 조금
+        덜 채워질 뿐이고 (구멍), 넘치는 일은 없음.
+        """
+        if n <= 0:
+            return
+        with self.lock:
+            if folder_name == self._cur_name:
+                self._cur_count = max(0, self._cur_count - n)
 
     def confirm_download(self, video_id, folder_name=None):
-        """다운로드 성공 후 매핑 저장"""
+        """다운로드 성공 후 매핑 저장 (슬롯은 할당 때 이미 예약됨)"""
         with self.lock:
             if folder_name:
                 self.mapping[video_id] = folder_name
-            self._save_mapping()
+                # 전체 재작성 대신 한 줄 append
+                self._journal_fp.write(json.dumps({"vid": video_id, "folder": folder_name}) + "\n")
 
     def find_video(self, video_id):
         """video_id로 폴더 찾기"""
@@ -138,11 +229,33 @@ class FolderManager:
 
 
 class DownloadLogger:
-    """다운로드 로그 관리"""
+    """다운로드 로그 관리
+
+    pending은 메모리 set으로 관리 — 완료/실패 때마다 pending 파일 전체를
+    다시 쓰는 O(N) 대신, 제거된 id만 tombstone 파일에 append하고
+    종료 시 flush_pending()으로 한 번 다시 씀. 시작할 때는
+    pending - tombstone 차집합으로 복원하므로 중간에 죽어도 안전.
+    """
 
     def __init__(self):
         os.makedirs(LOG_DIR, exist_ok=True)
         self.lock = threading.Lock()
+        self.pending_set = self._load_pending()
+        # append 핸들은 한 번 열어 재사용 (라인 버퍼링 — 완료마다 open 안 함)
+        self._completed_fp = open(COMPLETED_LOG, "a", buffering=1)
+        self._failed_fp = open(FAILED_LOG, "a", buffering=1)
+        self._removed_fp = open(PENDING_REMOVED_LOG, "a", buffering=1)
+
+    def _load_pending(self):
+        """pending 목록 로드 (지난 실행의 tombstone 반영)"""
+        if not os.path.exists(PENDING_LOG):
+            return set()
+        with open(PENDING_LOG, "r") as f:
+            pending = set(line.strip() for line in f if line.strip())
+        if os.path.exists(PENDING_REMOVED_LOG):
+            with open(PENDING_REMOVED_LOG, "r") as f:
+                pending -= set(line.strip() for line in f if line.strip())
+        return pending
 
     def init_logs(self, video_ids):
         """로그 초기화 (전체 비디오 목록에서)"""
@@ -164,43 +277,64 @@ class DownloadLogger:
         with open(PENDING_LOG, "w") as f:
             for vid in pending:
                 f.write(f"{vid}\n")
+        # 새 pending 기준으로 tombstone 초기화
+        open(PENDING_REMOVED_LOG, "w").close()
+        self.pending_set = set(pending)
 
         return len(pending), len(completed), len(failed)
 
     def get_pending(self, limit=None):
         """대기 중인 비디오 목록 반환"""
+        videos = list(self.pending_set)
+        return videos[:limit] if limit else videos
+
+    def iter_pending(self):
+        """대기 중인 비디오를 파일 순서대로 하나씩 생성
+
+        전체 목록을 리스트로 복사하지 않으므로 목표량을 채우고 일찍
+        끝나는 실행에서는 앞부분만 읽음. 진행 중 mark_* 가 set을
+        바꿔도 파일을 걷는 이 제너레이터는 안전함.
+        """
         if not os.path.exists(PENDING_LOG):
-            return []
+            return
         with open(PENDING_LOG, "r") as f:
-            videos = [line.strip() for line in f if line.strip()]
-        return videos[:limit] if limit else videos
+            for line in f:
+                vid = line.strip()
+                if vid and vid in self.pending_set:
+                    yield vid
 
     def mark_completed(self, video_id, file_size=0):
         """다운로드 완료 기록"""
         with self.lock:
-            with open(COMPLETED_LOG, "a") as f:
-                f.write(f"{video_id}\n")
-            self._remove_from_pending(video_id)
+            self._completed_fp.write(f"{video_id}\n")
+            self.pending_set.discard(video_id)
+            self._removed_fp.write(f"{video_id}\n")
 
     def mark_failed(self, video_id, error=""):
         """실패 기록"""
         with self.lock:
-            with open(FAILED_LOG, "a") as f:
-                f.write(f"{video_id}\t{error}\n")
-            self._remove_from_pending(video_id)
+            self._failed_fp.write(f"{video_id}\t{error}\n")
+            self.pending_set.discard(video_id)
+            self._removed_fp.write(f"{video_id}\n")
 
-    def _remove_from_pending(self, video_id):
-        """대기 목록에서 제거"""
-        if not os.path.exists(PENDING_LOG):
-            return
-        with open(PENDING_LOG, "r") as f:
-            lines = [l.strip() for l in f if l.strip() and l.strip() != video_id]
-        with open(PENDING_LOG, "w") as f:
-            f.write("\n".join(lines) + "\n" if lines else "")
+    def flush_pending(self):
+        """pending 파일을 현재 set 기준으로 한 번 다시 쓰고 tombstone 비움"""
+        with self.lock:
+            with open(PENDING_LOG, "w") as f:
+                for vid in self.pending_set:
+                    f.write(f"{vid}\n")
+            open(PENDING_REMOVED_LOG, "w").close()
+
+    def close(self):
+        """열어 둔 로그 핸들 정리"""
+        with self.lock:
+            self._completed_fp.close()
+            self._failed_fp.close()
+            self._removed_fp.close()
 
     def get_stats(self):
         """통계 반환"""
-        pending = len(self.get_pending())
+        pending = len(self.pending_set)
         completed = 0
         failed = 0
 
@@ -215,64 +349,114 @@ class DownloadLogger:
         return {"pending": pending, "completed": completed, "failed": failed}
 
 
-def download_video(video_id, youtube_url, output_path, timeout=120):
-    """단일 비디오 다운로드"""
-    output_dir = os.path.dirname(output_path)
-    temp_path = os.path.join(output_dir, f"{video_id}.%(ext)s")
+async def download_batch(batch, output_dir, timeout=120):
+    """yt-dlp 한 번 호출로 배치 전체 다운로드 (async subprocess)
+
+    URL 목록을 파일로 넘기면(-a) 프로세스 기동/임포트/TLS 연결이
+    배치당 1회가 됨. 스레드는 waitpid에 묶여 스택만 차지하므로
+    이벤트 루프 하나가 모든 자식을 감독. 결과는 비디오별 파일
+    존재/크기로 판정. batch: [(video_id, youtube_url), ...]
+    """
+    list_path = os.path.join(output_dir, f".urls_{id(batch) & 0xffffff:06x}.txt")
+    with open(list_path, "w") as f:
+        for _, url in batch:
+            f.write(f"{url}\n")
 
     cmd = [
         "yt-dlp",
         "-f", "bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/bestvideo[height<=480]+bestaudio/best[height<=480]/best",
         "--merge-output-format", "mp4",
-        "-o", temp_path,
+        "-o", os.path.join(output_dir, "%(id)s.%(ext)s"),
         "--no-warnings", "-q", "--no-progress",
         "--retries", "2", "--fragment-retries", "2",
-        "--buffer-size", "16K",
+        # DASH fragment를 비디오 안에서도 병렬로, 버퍼는 16K 대신 1M
+        # (16K는 HTTP 읽기마다 syscall을 유발)
+        "--concurrent-fragments", "4",
+        "--buffer-size", "1M",
         "--no-overwrites",
         "--no-write-info-json", "--no-write-thumbnail", "--no-write-description",
-        youtube_url,
+        "--ignore-errors",
+        # 성공한 비디오의 최종 경로를 stdout으로 한 줄씩 보고받음 —
+        # 확장자별 exists/getsize 더듬기와 rename 탐색이 필요 없어짐
+        "--print", "after_move:filepath",
+        "-a", list_path,
     ]
 
     if FFMPEG_PATH:
         cmd.insert(1, "--ffmpeg-location")
         cmd.insert(2, os.path.dirname(FFMPEG_PATH))
 
+    stderr = ""
+    timed_out = False
+    printed = {}  # video_id -> yt-dlp가 보고한 최종 파일 경로
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-
-        # 파일 확인
-        actual_path = None
-        for ext in [".mp4", ".mkv", ".webm"]:
-            check_path = os.path.join(output_dir, f"{video_id}{ext}")
-            if os.path.exists(check_path) and os.path.getsize(check_path) > 10000:
-                actual_path = check_path
-                break
-
-        if actual_path:
-            file_size = os.path.getsize(actual_path)
+        # stdout에는 --print가 찍는 경로만 나옴, stderr는 실패한 경우에만 디코드
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            # 타임아웃은 비디오당 기준을 배치 크기로 환산
+            stdout_bytes, stderr_bytes = await asyncio.wait_for(
+                proc.communicate(), timeout * len(batch))
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            timed_out = True
+            stdout_bytes = b""
+            stderr_bytes = b""
+        for line in stdout_bytes.decode("utf-8", "replace").splitlines():
+            line = line.strip()
+            if line:
+                printed[os.path.splitext(os.path.basename(line))[0]] = line
+        if not timed_out and proc.returncode != 0:
+            stderr = stderr_bytes.decode("utf-8", "replace")
+    except Exception as e:
+        stderr = str(e)
+    finally:
+        try:
+            os.remove(list_path)
+        except OSError:
+            pass
+
+    # 비디오별 결과 판정 — yt-dlp가 보고한 경로를 신뢰 (stat 1회)
+    results = []
+    stderr_low = stderr.lower()
+    for video_id, _ in batch:
+        actual_path = printed.get(video_id)
+        file_size = os.path.getsize(actual_path) if actual_path and os.path.exists(actual_path) else 0
+
+        if file_size > 10000:
+            output_path = os.path.join(output_dir, f"{video_id}.mp4")
             if actual_path != output_path:
                 if os.path.exists(output_path):
                     os.remove(output_path)
                 os.rename(actual_path, output_path)
-            return {"status": "success", "video_id": video_id, "size": file_size}
-        else:
-            stderr = result.stderr.lower() if result.stderr else ""
-            if any(kw in stderr for kw in ["unavailable", "private", "removed", "not available"]):
-                return {"status": "unavailable", "video_id": video_id, "error": "Video unavailable"}
-            return {"status": "failed", "video_id": video_id, "error": result.stderr or "Unknown"}
+            results.append({"status": "success", "video_id": video_id, "size": file_size})
+            continue
 
-    except subprocess.TimeoutExpired:
-        for ext in [".mp4", ".mkv", ".webm", ".part", ".ytdl"]:
+        # 찌꺼기 part 파일 정리
+        for ext in [".part", ".ytdl"]:
             temp_file = os.path.join(output_dir, f"{video_id}{ext}")
             if os.path.exists(temp_file):
                 try:
                     os.remove(temp_file)
-                except:
+                except OSError:
                     pass
-        return {"status": "timeout", "video_id": video_id, "error": "Timeout"}
 
-    except Exception as e:
-        return {"status": "failed", "video_id": video_id, "error": str(e)}
+        if timed_out:
+            results.append({"status": "timeout", "video_id": video_id, "error": "Timeout"})
+        elif any(kw in stderr_low for kw in ["http error 429", "too many requests",
+                                             "sign in to confirm"]):
+            # 레이트 리밋은 비디오 문제가 아님 — 실패로 기록하면 영영 재시도 안 됨
+            results.append({"status": "rate_limited", "video_id": video_id, "error": "Rate limited"})
+        elif any(kw in stderr_low for kw in ["unavailable", "private", "removed", "not available"]):
+            results.append({"status": "unavailable", "video_id": video_id, "error": "Video unavailable"})
+        else:
+            results.append({"status": "failed", "video_id": video_id,
+                            "error": stderr[-500:] if stderr else "Unknown"})
+    return results
 
 
 def run_download(target_gb=DEFAULT_TARGET_GB, workers=4, timeout=120):
@@ -280,26 +464,31 @@ def run_download(target_gb=DEFAULT_TARGET_GB, workers=4, timeout=120):
     # 20GB = 200개 성공 기준
     target_success = int(target_gb * 10)  # 1GB = 10개
 
-    # URL 매핑 로드
-    with open("youtube_id_to_urls_mapping.json", "r") as f:
-        url_mapping = json.load(f)
+    # URL 매핑 로드 — 중첩 dict를 한 번 평탄화해서 비디오당 조회를
+    # urls.get(vid) 한 번으로 (중첩 dict들은 여기서 바로 GC됨)
+    with open("youtube_id_to_urls_mapping.json", "rb") as f:
+        url_mapping = _loads(f.read())
+    urls = {k: v["youtube_url"] for k, v in url_mapping.items() if v.get("youtube_url")}
+    del url_mapping
 
     logger = DownloadLogger()
     folder_mgr = FolderManager(OUTPUT_BASE_DIR)
 
-    pending = logger.get_pending()
-    if not pending:
+    pending_count = len(logger.pending_set)
+    if not pending_count:
         print("다운로드할 비디오가 없습니다.")
         return 0
 
-    print(f"대기 중인 비디오: {len(pending):,}개")
+    print(f"대기 중인 비디오: {pending_count:,}개")
     print(f"목표: {target_success}개 성공 (~{target_gb}GB)")
 
     # 통계
     total_bytes = 0
     success_count = 0
     fail_count = 0
+    rate_limited_count = 0
     start_time = time.time()
+    last_print = 0.0
 
     stop_flag = threading.Event()
 
@@ -309,93 +498,124 @@ def run_download(target_gb=DEFAULT_TARGET_GB, workers=4, timeout=120):
 
     signal.signal(signal.SIGINT, signal_handler)
 
-    # 다운로드할 목록 준비
-    download_list = []
-    for vid in pending:
-        if vid in url_mapping and url_mapping[vid].get("youtube_url"):
-            download_list.append((vid, url_mapping[vid]["youtube_url"]))
+    # 대기 목록을 미리 리스트로 펼치지 않고 필요한 만큼만 스트리밍 —
+    # 목표량을 채우면 뒷부분은 아예 읽지 않음
+    def iter_downloadable():
+        for vid in logger.iter_pending():
+            url = urls.get(vid)
+            if not url:
+                continue
+            # 이미 받아둔 파일은 배치에 넣지 않음
+            mapped_path = folder_mgr.find_video(vid)
+            if mapped_path and os.path.exists(mapped_path) and os.path.getsize(mapped_path) > 10000:
+                logger.mark_completed(vid)
+                continue
+            yield vid, url
+
+    # BATCH_SIZE 단위로 묶음 — yt-dlp 기동 비용을 배치당 1회로
+    def iter_batches():
+        it = iter_downloadable()
+        while True:
+            batch = list(islice(it, BATCH_SIZE))
+            if not batch:
+                return
+            yield batch
 
-    if not download_list:
-        print("다운로드 가능한 비디오 URL이 없습니다.")
-        return 0
+    batch_iter = iter_batches()
 
-    print(f"다운로드 시작 (workers: {workers})...")
+    print(f"다운로드 시작 (workers: {workers}, batch: {BATCH_SIZE})...")
 
-    download_iter = iter(download_list)
+    async def _supervise():
+        # OS 스레드 없이 이벤트 루프 하나가 모든 yt-dlp 자식을 감독 —
+        # in-flight 상한은 제출 개수로 직접 관리
+        nonlocal total_bytes, success_count, fail_count, rate_limited_count, last_print
+        tasks = {}  # task -> (batch, folder_name)
 
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {}  # future -> (vid_id, folder_name)
+        def submit_next():
+            try:
+                batch = next(batch_iter)
+            except StopIteration:
+                return False
+            folder_path, folder_name = folder_mgr.get_batch_output_dir(len(batch))
+            task = asyncio.create_task(download_batch(batch, folder_path, timeout))
+            tasks[task] = (batch, folder_name)
+            return True
 
         # 초기 작업 제출 (워커 수만큼)
         for _ in range(workers * 2):
-            try:
-                vid_id, url = next(download_iter)
-                output_path, folder_name = folder_mgr.get_output_path(vid_id)
-
-                # 이미 존재하면 스킵
-                if os.path.exists(output_path) and os.path.getsize(output_path) > 10000:
-                    logger.mark_completed(vid_id)
-                    continue
-
-                future = executor.submit(download_video, vid_id, url, output_path, timeout)
-                futures[future] = (vid_id, folder_name)
-            except StopIteration:
+            if not submit_next():
                 break
 
-        while futures and not stop_flag.is_set():
-            # 완료된 작업 처리
-            done_futures = []
-            for future in list(futures.keys()):
-                if future.done():
-                    done_futures.append(future)
-
-            if not done_futures:
-                time.sleep(0.1)
+        while tasks and not stop_flag.is_set():
+            # 배치가 끝나는 즉시 깨어나고, timeout은 중단 신호 확인용
+            done, _ = await asyncio.wait(tasks.keys(),
+                                         return_when=asyncio.FIRST_COMPLETED,
+                                         timeout=1.0)
+            if not done:
                 continue
 
-            for future in done_futures:
-                vid_id, folder_name = futures.pop(future)
-                result = future.result()
-
-                if result["status"] == "success":
-                    file_size = result.get("size", 0)
-                    total_bytes += file_size
-                    success_count += 1
-                    logger.mark_completed(vid_id, file_size)
-                    folder_mgr.confirm_download(vid_id, folder_name)
-
-                    # 진행 상황 출력
-                    total_mb = total_bytes / 1024 / 1024
-                    elapsed = time.time() - start_time
-                    speed = total_mb / elapsed if elapsed > 0 else 0
-                    print(f"\r성공: {success_count}/{target_success} | 실패: {fail_count} | "
-                          f"{total_mb/1024:.2f}GB | {speed:.1f}MB/s    ", end="", flush=True)
-
-                    # 목표 도달 체크
-                    if success_count >= target_success:
-                        print(f"\n\n목표 {target_success}개 성공 도달!")
-                        # 남은 작업 취소
-                        for f in futures:
-                            f.cancel()
-                        futures.clear()
-                        break
-                else:
-                    fail_count += 1
-                    logger.mark_failed(vid_id, result.get("error", ""))
+            for task in done:
+                batch, folder_name = tasks.pop(task)
+                reached_target = False
+                batch_rate_limited = 0
+                batch_success = 0
+
+                for result in task.result():
+                    vid_id = result["video_id"]
+
+                    if result["status"] == "success":
+                        file_size = result.get("size", 0)
+                        total_bytes += file_size
+                        success_count += 1
+                        logger.mark_completed(vid_id, file_size)
+                        folder_mgr.confirm_download(vid_id, folder_name)
+                        batch_success += 1
+
+                        # 진행 상황 출력 — tty write+flush를 최대 10 Hz로 제한
+                        now = time.monotonic()
+                        if now - last_print > 0.1 or success_count >= target_success:
+                            last_print = now
+                            total_mb = total_bytes / 1024 / 1024
+                            elapsed = time.time() - start_time
+                            speed = total_mb / elapsed if elapsed > 0 else 0
+                            print(f"\r성공: {success_count}/{target_success} | 실패: {fail_count} | "
+                                  f"{total_mb/1024:.2f}GB | {speed:.1f}MB/s    ", end="", flush=True)
+
+                        # 목표 도달 체크
+                        if success_count >= target_success:
+                            reached_target = True
+                    elif result["status"] == "rate_limited":
+                        # mark_failed 하지 않음 — pending에 남겨 두면
+                        # 다음 실행에서 자연스럽게 재시도됨
+                        batch_rate_limited += 1
+                        rate_limited_count += 1
+                    else:
+                        fail_count += 1
+                        logger.mark_failed(vid_id, result.get("error", ""))
+
+                # 파일이 안 생긴 예약분 반납 — 다음 배치가 그 자리를 쓸 수 있게
+                folder_mgr.release_slots(folder_name, len(batch) - batch_success)
+
+                if reached_target:
+                    print(f"\n\n목표 {target_success}개 성공 도달!")
+                    # 남은 작업 취소
+                    for t in tasks:
+                        t.cancel()
+                    tasks.clear()
+                    break
+
+                # 429가 나온 직후 바로 다음 배치를 던지면 차단만 길어짐 —
+                # 새 제출 전에 잠시 식힘 (진행 중인 배치는 그대로 둠)
+                if batch_rate_limited and not stop_flag.is_set():
+                    print(f"\n레이트 리밋 감지 ({batch_rate_limited}개) — "
+                          f"{RATE_LIMIT_COOLDOWN}초 대기...")
+                    await asyncio.sleep(RATE_LIMIT_COOLDOWN)
 
                 # 새 작업 제출 (목표 미달성 시)
                 if success_count < target_success and not stop_flag.is_set():
-                    try:
-                        vid_id, url = next(download_iter)
-                        output_path, folder_name = folder_mgr.get_output_path(vid_id)
-
-                        if os.path.exists(output_path) and os.path.getsize(output_path) > 10000:
-                            logger.mark_completed(vid_id)
-                        else:
-                            new_future = executor.submit(download_video, vid_id, url, output_path, timeout)
-                            futures[new_future] = (vid_id, folder_name)
-                    except StopIteration:
-                        pass  # 더 이상 대기 목록 없음
+                    submit_next()
+
+    asyncio.run(_supervise())
 
     # 최종 결과
     elapsed = time.time() - start_time
@@ -404,8 +624,15 @@ def run_download(target_gb=DEFAULT_TARGET_GB, workers=4, timeout=120):
     print(f"\n\n완료!")
     print(f"  다운로드: {total_gb_done:.2f}GB ({success_count}개)")
     print(f"  실패: {fail_count}개")
+    if rate_limited_count:
+        print(f"  레이트 리밋으로 보류 (pending 유지): {rate_limited_count}개")
     print(f"  소요시간: {elapsed/60:.1f}분")
 
+    # pending 로그를 한 번 다시 써서 tombstone 정리, 매핑 journal 합치기
+    logger.flush_pending()
+    logger.close()
+    folder_mgr.close()
+
     # 상태 저장
     state = {
         "last_run": datetime.now().isoformat(),
@@ -413,8 +640,7 @@ def run_download(target_gb=DEFAULT_TARGET_GB, workers=4, timeout=120):
         "success": success_count,
         "failed": fail_count
     }
-    with open(DOWNLOAD_STATE, "w") as f:
-        json.dump(state, f, indent=2)
+    _atomic_write_json(DOWNLOAD_STATE, state)
 
     return success_count
 
@@ -458,8 +684,8 @@ def main():
         print(f"  실패: {stats['failed']:,}개")
 
         if os.path.exists(DOWNLOAD_STATE):
-            with open(DOWNLOAD_STATE, "r") as f:
-                state = json.load(f)
+            with open(DOWNLOAD_STATE, "rb") as f:
+                state = _loads(f.read())
             print(f"\n마지막 실행: {state.get('last_run', 'N/A')}")
             print(f"다운로드량: {state.get('downloaded_gb', 0):.2f}GB")
 
@@ -1,5 +1,6 @@
 import datasets
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 DATASETS = [
     "allenai/Molmo2-VideoCapQA",
@@ -45,7 +46,10 @@ def get_video_ids_from_dataset(dataset_name):
                     break
 
             if video_col:
-                split_ids = set(ds[video_col])
+                # set(ds[col])은 컬럼 전체를 파이썬 문자열 리스트로 꺼낸 뒤
+                # dedup — ds.unique는 Arrow(C) 안에서 중복을 제거하고
+                # 고유값만 파이썬 객체로 만들어 줌
+                split_ids = set(ds.unique(video_col))
                 video_ids.update(split_ids)
                 print(f"    Samples: {len(ds)}, Unique videos: {len(split_ids)}")
             else:
@@ -62,13 +66,18 @@ def main():
     all_video_ids = set()
     dataset_stats = {}
 
-    for ds_name in DATASETS:
-        video_ids, total_samples = get_video_ids_from_dataset(ds_name)
-        dataset_stats[ds_name] = {
-            "samples": total_samples,
-            "unique_videos": len(video_ids),
-        }
-        all_video_ids.update(video_ids)
+    # 데이터셋별 fetch는 HF Hub 네트워크 지연이 지배적 — 4개를 동시에 받음
+    # (로그는 섞여서 나올 수 있음)
+    with ThreadPoolExecutor(max_workers=len(DATASETS)) as executor:
+        futures = {executor.submit(get_video_ids_from_dataset, n): n for n in DATASETS}
+        for future in as_completed(futures):
+            ds_name = futures[future]
+            video_ids, total_samples = future.result()
+            dataset_stats[ds_name] = {
+                "samples": total_samples,
+                "unique_videos": len(video_ids),
+            }
+            all_video_ids.update(video_ids)
 
     # Print summary
     print("\n" + "="*60)
@@ -76,7 +85,8 @@ def main():
     print("="*60)
 
     print("\n[Dataset별 통계]")
-    for ds_name, stats in dataset_stats.items():
+    for ds_name in DATASETS:
+        stats = dataset_stats[ds_name]
         short_name = ds_name.split("/")[-1]
         print(f"  {short_name}:")
         print(f"    - 샘플 수: {stats['samples']:,}")
@@ -98,9 +108,10 @@ def main():
 
     # Save video IDs to file
     output_file = "all_required_video_ids.txt"
-    with open(output_file, "w") as f:
-        for vid_id in sorted(all_video_ids):
-            f.write(vid_id + "\n")
+    # ID당 write() 호출 대신 join으로 한 번에 만들어 큰 버퍼로 기록
+    with open(output_file, "w", buffering=1 << 20) as f:
+        f.write("\n".join(sorted(all_video_ids)))
+        f.write("\n")
     print(f"\n고유 영상 ID 목록 저장됨: {output_file}")
 
 
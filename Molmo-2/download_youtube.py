@@ -26,25 +26,46 @@ Molmo2 YouTube 비디오 다운로드 스크립트
 """
 
 import json
+import math
 import os
-import subprocess
+import re
+import shutil
 import argparse
 import time
 import threading
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import deque, namedtuple
+from itertools import islice
 import signal
+import socket
 import sys
 
+# 멀티 MB짜리 매핑 JSON 로드가 stdlib 디코더에서는 수 초 — orjson이
+# 있으면 사용하고(3~6배), 없으면 stdlib로 동작
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# yt-dlp를 서브프로세스가 아니라 라이브러리로 사용 — 비디오마다
+# 파이썬 인터프리터 기동 + import 비용(수백 ms)을 내지 않음
+try:
+    import yt_dlp
+except ImportError:
+    print("오류: yt-dlp가 설치되어 있지 않습니다.")
+    print("설치: pip install yt-dlp")
+    sys.exit(1)
+
 # ffmpeg 경로 설정
 def get_ffmpeg_path():
     """ffmpeg 경로 찾기 및 symlink 생성"""
-    # 시스템 ffmpeg 확인
-    result = subprocess.run(["which", "ffmpeg"], capture_output=True, text=True)
-    if result.returncode == 0:
-        return result.stdout.strip()
+    # 시스템 ffmpeg 확인 — fork/exec 없이 파이썬이 PATH를 직접 탐색
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        return ffmpeg
 
     # imageio-ffmpeg 확인
     try:
@@ -69,11 +90,82 @@ def get_ffmpeg_path():
 
 FFMPEG_PATH = get_ffmpeg_path()
 
+# 모든 다운로드가 공유하는 yt-dlp 옵션 (한 번만 구성)
+YDL_PARAMS = {
+    # 포맷: 480p 이하, mp4 선호, 작은 파일 우선
+    "format": "bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/bestvideo[height<=480]+bestaudio/best[height<=480]/best",
+    "merge_output_format": "mp4",
+    # 조용한 모드 (에러만 출력)
+    "quiet": True,
+    "no_warnings": True,
+    "noprogress": True,
+    # 재시도 설정
+    "retries": 2,
+    "fragment_retries": 2,
+    # 속도 제한 감지를 위한 버퍼 설정
+    "buffersize": 16 * 1024,
+    # 이미 있으면 스킵
+    "overwrites": False,
+    # 메타데이터 스킵 (속도 향상)
+    "writeinfojson": False,
+    "writethumbnail": False,
+    "writedescription": False,
+    # 블로킹 소켓이 죽은 연결에 매달리지 않게
+    "socket_timeout": 10,
+    # IPv6 폴백 시도는 잘못 설정된 망에서 타임아웃만 먹음 — IPv4 강제
+    "source_address": "0.0.0.0",
+}
+if FFMPEG_PATH:
+    YDL_PARAMS["ffmpeg_location"] = os.path.dirname(FFMPEG_PATH)
+
+
+class DownloadTimeout(Exception):
+    """progress hook에서 던져 진행 중인 다운로드를 중단시키는 신호"""
+
+
+# 키워드 4개를 각각 in으로 찾으면 lower() 복사본 + 4회 스캔 —
+# 한 번 컴파일한 대안(|) 패턴으로 한 패스에 판정
+_UNAVAIL_RE = re.compile(r"(?i)unavailable|private|removed|not available|sign in")
+
+
+# 스레드당 YoutubeDL 인스턴스 하나를 재사용 — 인스턴스 안의 HTTP
+# 커넥션 풀(keep-alive)과 extractor 캐시가 다운로드 사이에 유지돼
+# TCP+TLS 핸드셰이크를 비디오마다 다시 하지 않음
+_tls = threading.local()
+
+
+def _deadline_hook(d):
+    # 다운로드 루프 안에서 주기적으로 불림 — 시간 초과면 예외로 중단
+    if time.time() > _tls.deadline:
+        raise DownloadTimeout()
+
+
+def _get_ydl():
+    ydl = getattr(_tls, "ydl", None)
+    if ydl is None:
+        params = dict(YDL_PARAMS)
+        params["progress_hooks"] = [_deadline_hook]
+        ydl = yt_dlp.YoutubeDL(params)
+        _tls.ydl = ydl
+    return ydl
+
+
+# dict 대신 namedtuple 스냅샷 — 호출마다 dict 엔트리 9개를 할당하지
+# 않고, 키 오타가 AttributeError로 바로 드러남
+Summary = namedtuple(
+    "Summary",
+    "success failed skipped timeout unavailable total_bytes elapsed_seconds speed_mbps",
+)
+
 
 class DownloadStats:
-    """다운로드 통계 추적"""
-    def __init__(self):
-        self.lock = threading.Lock()
+    """다운로드 통계 추적
+
+    모든 add_*는 결과를 소비하는 메인 루프 한 스레드에서만 불림 —
+    다른 스레드는 읽기만 하므로 (int 읽기는 GIL 하에서 원자적)
+    완료마다 락을 잡을 이유가 없음.
+    """
+    def __init__(self, error_log_path=None):
         self.success = 0
         self.failed = 0
         self.skipped = 0
@@ -81,45 +173,77 @@ class DownloadStats:
         self.unavailable = 0
         self.total_bytes = 0
         self.start_time = time.time()
-        self.errors = []
+        # 메모리에는 최근 100개만 (진행 파일에 넣을 만큼) — 전체 이력은
+        # 실패 시점에 라인 버퍼 로그로 바로 내려감, 실패가 수만 건이어도
+        # 메모리가 같이 늘지 않음
+        self.errors = deque(maxlen=100)
+        self._err_fp = open(error_log_path, "a", buffering=1) if error_log_path else None
+        # 마지막 저장 이후 변경이 있었는지 — CPython에서 bool 대입은
+        # 원자적이므로 락 없이 플래그로만 사용
+        self.dirty = False
+        # 30초 창 EMA 속도 — 누적 평균(total/elapsed)은 버스트를 뭉개서
+        # 현재 상태를 오도함. 리포터 스레드가 tick()으로 갱신
+        self.ema_bytes_per_sec = 0.0
+        self.ema_tau = 30.0
+        self.last_sample_t = self.start_time
+        self.last_sample_bytes = 0
+        self._cached_summary = None
+        self._cached_at = 0.0
+
+    def tick(self):
+        """리포터 스레드에서 주기적으로 호출 — EMA 속도 갱신"""
+        now = time.time()
+        dt = now - self.last_sample_t
+        if dt <= 0:
+            return
+        inst = (self.total_bytes - self.last_sample_bytes) / dt
+        alpha = 1 - math.exp(-dt / self.ema_tau)
+        self.ema_bytes_per_sec = inst * alpha + self.ema_bytes_per_sec * (1 - alpha)
+        self.last_sample_t = now
+        self.last_sample_bytes = self.total_bytes
 
     def add_success(self, size_bytes=0):
-        with self.lock:
-            self.success += 1
-            self.total_bytes += size_bytes
+        self.success += 1
+        self.total_bytes += size_bytes
+
+    def _log_error(self, video_id, error):
+        self.errors.append((video_id, error))
+        if self._err_fp:
+            self._err_fp.write(f"{video_id}\t{str(error).replace(chr(10), ' ')}\n")
 
     def add_failed(self, video_id, error):
-        with self.lock:
-            self.failed += 1
-            self.errors.append((video_id, error))
+        self.failed += 1
+        self._log_error(video_id, error)
 
     def add_skipped(self):
-        with self.lock:
-            self.skipped += 1
+        self.skipped += 1
 
     def add_timeout(self, video_id):
-        with self.lock:
-            self.timeout += 1
-            self.errors.append((video_id, "Timeout - too slow"))
+        self.timeout += 1
+        self._log_error(video_id, "Timeout - too slow")
 
     def add_unavailable(self, video_id):
-        with self.lock:
-            self.unavailable += 1
-            self.errors.append((video_id, "Video unavailable"))
-
-    def get_summary(self):
-        elapsed = time.time() - self.start_time
-        speed = self.total_bytes / elapsed / 1024 / 1024 if elapsed > 0 else 0  # MB/s
-        return {
-            "success": self.success,
-            "failed": self.failed,
-            "skipped": self.skipped,
-            "timeout": self.timeout,
-            "unavailable": self.unavailable,
-            "total_bytes": self.total_bytes,
-            "elapsed_seconds": elapsed,
-            "speed_mbps": speed,
-        }
+        self.unavailable += 1
+        self._log_error(video_id, "Video unavailable")
+
+    def get_summary(self, max_age=0.5):
+        now = time.time()
+        # 리포터와 출력이 연달아 부르면 직전 스냅샷 재사용
+        if self._cached_summary is not None and now - self._cached_at < max_age:
+            return self._cached_summary
+        elapsed = now - self.start_time
+        summary = Summary(
+            success=self.success,
+            failed=self.failed,
+            skipped=self.skipped,
+            timeout=self.timeout,
+            unavailable=self.unavailable,
+            total_bytes=self.total_bytes,
+            elapsed_seconds=elapsed,
+            speed_mbps=self.ema_bytes_per_sec / 1024 / 1024,  # MB/s (30초 EMA)
+        )
+        self._cached_summary, self._cached_at = summary, now
+        return summary
 
 
 def load_required_video_ids(filepath="all_required_video_ids.txt"):
@@ -129,9 +253,14 @@ def load_required_video_ids(filepath="all_required_video_ids.txt"):
 
 
 def load_url_mapping(filepath="youtube_id_to_urls_mapping.json"):
-    """비디오 ID -> URL 매핑 로드"""
-    with open(filepath, "r") as f:
-        return json.load(f)
+    """비디오 ID -> URL 매핑 로드 (평탄화한 {id: url} dict)
+
+    원본은 항목마다 {"youtube_url": ...} 중첩 dict — 한 번 평탄화하면
+    이후 조회가 .get 한 번이고, 항목당 dict 하나씩 메모리도 덜 씀.
+    """
+    with open(filepath, "rb") as f:
+        data = _loads(f.read())
+    return {k: v.get("youtube_url") for k, v in data.items() if v.get("youtube_url")}
 
 
 def get_output_path(video_id, output_dir):
@@ -140,11 +269,12 @@ def get_output_path(video_id, output_dir):
 
 
 def check_existing_file(video_id, output_dir):
-    """이미 다운로드된 파일 확인"""
+    """이미 다운로드된 파일 확인 (stat 한 번으로 존재 + 크기 확인)"""
     output_path = get_output_path(video_id, output_dir)
-    if os.path.exists(output_path) and os.path.getsize(output_path) > 10000:  # 최소 10KB
-        return True, output_path
-    return False, output_path
+    try:
+        return os.stat(output_path).st_size > 10000, output_path  # 최소 10KB
+    except FileNotFoundError:
+        return False, output_path
 
 
 def download_video(video_id, youtube_url, output_dir, timeout=120, speed_limit_kb=50):
@@ -162,132 +292,115 @@ def download_video(video_id, youtube_url, output_dir, timeout=120, speed_limit_k
         dict: 결과 정보
     """
     output_path = get_output_path(video_id, output_dir)
-    temp_path = os.path.join(output_dir, f"{video_id}.%(ext)s")
-
-    # yt-dlp 옵션
-    cmd = [
-        "yt-dlp",
-        # 포맷: 480p 이하, mp4 선호, 작은 파일 우선
-        "-f", "bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/bestvideo[height<=480]+bestaudio/best[height<=480]/best",
-        # 출력 형식
-        "--merge-output-format", "mp4",
-        # 출력 경로
-        "-o", temp_path,
-        # 조용한 모드 (에러만 출력)
-        "--no-warnings",
-        "-q",
-        # 진행률 표시 안함
-        "--no-progress",
-        # 재시도 설정
-        "--retries", "2",
-        "--fragment-retries", "2",
-        # 속도 제한 감지를 위한 버퍼 설정
-        "--buffer-size", "16K",
-        # 이미 있으면 스킵
-        "--no-overwrites",
-        # 메타데이터 스킵 (속도 향상)
-        "--no-write-info-json",
-        "--no-write-thumbnail",
-        "--no-write-description",
-        # URL
-        youtube_url,
-    ]
-
-    # ffmpeg 경로 추가
-    if FFMPEG_PATH:
-        cmd.insert(1, "--ffmpeg-location")
-        cmd.insert(2, os.path.dirname(FFMPEG_PATH))
-
-    try:
-        # 타임아웃과 함께 실행
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-
-        # 다운로드된 파일 확인 (확장자가 다를 수 있음)
-        actual_path = None
-        for ext in [".mp4", ".mkv", ".webm"]:
-            check_path = os.path.join(output_dir, f"{video_id}{ext}")
-            if os.path.exists(check_path) and os.path.getsize(check_path) > 10000:
-                actual_path = check_path
-                break
 
-        if actual_path:
-            file_size = os.path.getsize(actual_path)
-            # mp4가 아니면 이름 변경
-            if actual_path != output_path and os.path.exists(actual_path):
-                if os.path.exists(output_path):
-                    os.remove(output_path)
-                os.rename(actual_path, output_path)
-            return {
-                "status": "success",
-                "video_id": video_id,
-                "path": output_path,
-                "size": file_size,
-            }
-        else:
-            # 파일이 없으면 에러 확인
-            stderr = result.stderr.lower() if result.stderr else ""
-            if "unavailable" in stderr or "private" in stderr or "removed" in stderr or "not available" in stderr:
-                return {"status": "unavailable", "video_id": video_id, "error": result.stderr}
-            return {"status": "failed", "video_id": video_id, "error": result.stderr or "Unknown error"}
+    _tls.deadline = time.time() + timeout
+    ydl = _get_ydl()
+    # 인스턴스는 재사용하고 출력 템플릿만 비디오별로 교체.
+    # YoutubeDL은 __init__에서 outtmpl을 {"default": ...} dict로
+    # 정규화해 두므로 같은 형태로 넣어야 함 — 평문 str을 넣으면
+    # prepare_filename의 .get()에서 AttributeError
+    ydl.params["outtmpl"] = {"default": os.path.join(output_dir, f"{video_id}.%(ext)s")}
 
-    except subprocess.TimeoutExpired:
+    error_msg = ""
+    actual_path = None
+    try:
+        # 같은 프로세스 안에서 직접 호출 — fork/exec 없음
+        info = ydl.extract_info(youtube_url, download=True)
+        # yt-dlp가 병합 후 최종 경로를 info dict로 알려줌 —
+        # 확장자별 exists/getsize 탐침(6~8 stat)이 필요 없음
+        if info:
+            requested = info.get("requested_downloads") or []
+            if requested and requested[0].get("filepath"):
+                actual_path = requested[0]["filepath"]
+
+    except DownloadTimeout:
         # 타임아웃 - 부분 다운로드 파일 정리
-        for ext in [".mp4", ".mkv", ".webm", ".part", ".ytdl"]:
-            temp_file = os.path.join(output_dir, f"{video_id}{ext}")
-            if os.path.exists(temp_file):
+        # 확장자별 exists 탐침(5~10 syscall) 대신 scandir 한 번으로
+        # 이 video_id 접두사의 찌꺼기만 골라 지움
+        prefix = video_id + "."
+        for entry in os.scandir(output_dir):
+            if entry.name.startswith(prefix) and \
+                    entry.name.rsplit(".", 1)[-1] in {"mp4", "mkv", "webm", "part", "ytdl"}:
                 try:
-                    os.remove(temp_file)
-                except:
+                    os.unlink(entry.path)
+                except OSError:
                     pass
         return {"status": "timeout", "video_id": video_id}
 
+    except yt_dlp.utils.DownloadError as e:
+        # stderr 파싱 대신 예외 메시지로 판정
+        error_msg = str(e)
+
     except Exception as e:
         return {"status": "failed", "video_id": video_id, "error": str(e)}
 
+    # 보고된 경로 하나만 확인 (stat 1회)
+    file_size = 0
+    if actual_path:
+        try:
+            file_size = os.path.getsize(actual_path)
+        except OSError:
+            actual_path = None
+
+    if actual_path and file_size > 10000:
+        # mp4가 아니면 이름 변경
+        if actual_path != output_path:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            os.rename(actual_path, output_path)
+        return {
+            "status": "success",
+            "video_id": video_id,
+            "path": output_path,
+            "size": file_size,
+        }
+
+    if error_msg and _UNAVAIL_RE.search(error_msg):
+        return {"status": "unavailable", "video_id": video_id, "error": error_msg}
+    return {"status": "failed", "video_id": video_id, "error": error_msg or "Unknown error"}
+
 
 def print_progress(stats, total, current):
     """진행 상황 출력"""
     summary = stats.get_summary()
-    elapsed = timedelta(seconds=int(summary["elapsed_seconds"]))
+    elapsed = timedelta(seconds=int(summary.elapsed_seconds))
 
     # 예상 남은 시간 계산
-    completed = summary["success"] + summary["failed"] + summary["timeout"] + summary["unavailable"]
+    completed = summary.success + summary.failed + summary.timeout + summary.unavailable
     if completed > 0:
-        rate = completed / summary["elapsed_seconds"]
+        rate = completed / summary.elapsed_seconds
         remaining = (total - current) / rate if rate > 0 else 0
         eta = timedelta(seconds=int(remaining))
     else:
         eta = "계산중..."
 
-    total_mb = summary["total_bytes"] / 1024 / 1024
+    total_mb = summary.total_bytes / 1024 / 1024
 
     print(f"\r[{current}/{total}] "
-          f"성공:{summary['success']} "
-          f"실패:{summary['failed']} "
-          f"타임아웃:{summary['timeout']} "
-          f"삭제됨:{summary['unavailable']} "
-          f"스킵:{summary['skipped']} | "
+          f"성공:{summary.success} "
+          f"실패:{summary.failed} "
+          f"타임아웃:{summary.timeout} "
+          f"삭제됨:{summary.unavailable} "
+          f"스킵:{summary.skipped} | "
           f"{total_mb:.1f}MB | "
-          f"{summary['speed_mbps']:.2f}MB/s | "
+          f"{summary.speed_mbps:.2f}MB/s | "
           f"경과:{elapsed} | ETA:{eta}    ", end="", flush=True)
 
 
 def save_progress(stats, output_dir):
-    """진행 상황 저장"""
+    """진행 상황 저장 (temp에 쓰고 os.replace — 중간에 죽어도 안 깨짐)"""
     summary = stats.get_summary()
     progress_file = os.path.join(output_dir, "download_progress.json")
+    tmp = progress_file + ".tmp"
 
-    with open(progress_file, "w") as f:
+    # indent 없이 압축 JSON — 쓰는 바이트를 줄임
+    with open(tmp, "w") as f:
         json.dump({
             "last_update": datetime.now().isoformat(),
-            "stats": summary,
-            "errors": stats.errors[-100:],  # 최근 100개 에러만 저장
-        }, f, indent=2, ensure_ascii=False)
+            "stats": summary._asdict(),
+            "errors": list(stats.errors),  # 최근 100개 에러만 저장
+        }, f, ensure_ascii=False)
+    os.replace(tmp, progress_file)
 
 
 def main():
@@ -308,6 +421,13 @@ def main():
     print("Molmo2 YouTube 비디오 다운로드")
     print("="*60)
 
+    # DNS 예열 — 첫 조회를 지금 해 두면 이후 워커들은 resolver 캐시를
+    # 맞음 (googlevideo CDN 호스트는 비디오마다 달라 예열 불가)
+    try:
+        socket.getaddrinfo("www.youtube.com", 443)
+    except OSError:
+        pass
+
     # 파일 로드
     print("\n필요한 비디오 ID 로드 중...")
     video_ids = load_required_video_ids()
@@ -316,51 +436,65 @@ def main():
     print("URL 매핑 로드 중...")
     url_mapping = load_url_mapping()
 
-    # 다운로드 목록 생성
-    videos_to_download = []
+    # 출력 디렉토리 생성
+    os.makedirs(args.output, exist_ok=True)
+
+    # 이미 다운로드된 파일 확인 — id마다 exists+getsize (stat 2회) 대신
+    # 출력 폴더를 scandir로 한 번 훑어 {id: size} dict를 만들고 조회만 함
+    existing = {}
+    if args.resume:
+        # 크기 조회(stat)는 스레드로 병렬 — 로컬 FS에서는 readdir 캐시로
+        # 어차피 싸고, NFS/FUSE처럼 entry.stat()이 왕복인 곳에서는 재개
+        # 스캔이 왕복 지연 × 파일 수에서 거의 병렬분의 1로 줄어듦
+        with os.scandir(args.output) as it:
+            entries = [e for e in it if e.name.endswith(".mp4")]
+
+        def entry_size(e):
+            try:
+                return e.stat().st_size if e.is_file() else 0
+            except OSError:
+                return 0
+
+        with ThreadPoolExecutor(max_workers=32) as ex:
+            existing = {
+                e.name[:-4]: size
+                for e, size in zip(entries, ex.map(entry_size, entries, chunksize=256))
+            }
+
+    # 다운로드 목록 생성 — 매핑 조회 → 범위 슬라이스 → 재개 필터를
+    # generator 한 줄기로 이어 붙여, 수십만 개짜리 중간 리스트 없이
+    # 최종 목록 하나만 materialize
     missing_mapping = 0
 
-    for vid_id in video_ids:
-        if vid_id in url_mapping:
-            youtube_url = url_mapping[vid_id].get("youtube_url")
+    def iter_mapped():
+        nonlocal missing_mapping
+        for vid_id in video_ids:
+            youtube_url = url_mapping.get(vid_id)
             if youtube_url:
-                videos_to_download.append((vid_id, youtube_url))
+                yield vid_id, youtube_url
             else:
                 missing_mapping += 1
-        else:
-            missing_mapping += 1
-
-    if missing_mapping > 0:
-        print(f"경고: {missing_mapping}개 비디오의 YouTube URL이 없음")
 
     # 범위 적용
-    if args.start > 0:
-        videos_to_download = videos_to_download[args.start:]
-    if args.limit > 0:
-        videos_to_download = videos_to_download[:args.limit]
+    stop = args.start + args.limit if args.limit > 0 else None
+    pairs = islice(iter_mapped(), args.start, stop)
     if args.test:
-        videos_to_download = videos_to_download[:5]
+        pairs = islice(pairs, 5)
         print(f"\n테스트 모드: 5개만 다운로드")
 
-    print(f"다운로드 대상: {len(videos_to_download):,}개")
-
-    # 출력 디렉토리 생성
-    os.makedirs(args.output, exist_ok=True)
-
-    # 이미 다운로드된 파일 확인
-    if args.resume:
-        filtered_videos = []
-        skipped_count = 0
-        for vid_id, url in videos_to_download:
-            exists, _ = check_existing_file(vid_id, args.output)
-            if exists:
-                skipped_count += 1
-            else:
-                filtered_videos.append((vid_id, url))
+    videos_to_download = []
+    skipped_count = 0
+    for vid_id, youtube_url in pairs:
+        if existing.get(vid_id, 0) > 10000:  # 최소 10KB — 이미 받아둔 파일
+            skipped_count += 1
+        else:
+            videos_to_download.append((vid_id, youtube_url))
 
-        if skipped_count > 0:
-            print(f"이미 다운로드됨 (스킵): {skipped_count:,}개")
-        videos_to_download = filtered_videos
+    if missing_mapping > 0:
+        print(f"경고: {missing_mapping}개 비디오의 YouTube URL이 없음")
+    print(f"다운로드 대상: {len(videos_to_download) + skipped_count:,}개")
+    if skipped_count > 0:
+        print(f"이미 다운로드됨 (스킵): {skipped_count:,}개")
 
     if not videos_to_download:
         print("\n다운로드할 새 비디오가 없습니다!")
@@ -375,7 +509,7 @@ def main():
     print(f"  - 포맷: mp4")
 
     # 통계 초기화
-    stats = DownloadStats()
+    stats = DownloadStats(os.path.join(args.output, "download_errors.txt"))
     total = len(videos_to_download)
 
     # Ctrl+C 핸들러
@@ -387,82 +521,116 @@ def main():
 
     signal.signal(signal.SIGINT, signal_handler)
 
+    # 진행 상황 출력은 전용 리포터 스레드가 1초마다 — 완료 루프가
+    # 매번 문자열 포맷 + tty write에 블록되지 않고, 터미널에 쓰는
+    # 주체도 하나로 모임
+    report_stop = threading.Event()
+
+    def reporter():
+        while not report_stop.is_set():
+            stats.tick()
+            summary = stats.get_summary()
+            completed_now = (summary.success + summary.failed
+                             + summary.timeout + summary.unavailable)
+            print_progress(stats, total, completed_now)
+            # 진행 상황 저장도 여기서 — 완료 루프는 디스크를 건드리지 않음
+            if stats.dirty:
+                stats.dirty = False
+                save_progress(stats, args.output)
+            report_stop.wait(1.0)
+
+    reporter_t = threading.Thread(target=reporter, daemon=True)
+    reporter_t.start()
+
     print(f"\n다운로드 시작...\n")
 
-    # 병렬 다운로드 실행
+    # 병렬 다운로드 실행 — 전체 future를 미리 만들지 않고 in-flight를
+    # workers*4로 제한하는 슬라이딩 윈도우 (피크 메모리가 O(N)에서
+    # O(workers)로, Ctrl+C도 윈도우만 비우면 끝이라 즉시 반응)
     completed = 0
+    pending_iter = iter(videos_to_download)
+    window = args.workers * 4
     with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        futures = {}
 
-        for vid_id, url in videos_to_download:
-            if stop_flag.is_set():
-                break
-            future = executor.submit(
-                download_video,
-                vid_id,
-                url,
-                args.output,
-                args.timeout
-            )
-            futures[future] = vid_id
-
-        for future in as_completed(futures):
-            if stop_flag.is_set():
+        def submit_one():
+            try:
+                vid_id, url = next(pending_iter)
+            except StopIteration:
+                return None
+            return executor.submit(download_video, vid_id, url,
+                                   args.output, args.timeout)
+
+        inflight = set()
+        for _ in range(window):
+            future = submit_one()
+            if future is None:
                 break
-
-            result = future.result()
-            completed += 1
-
-            if result["status"] == "success":
-                stats.add_success(result.get("size", 0))
-            elif result["status"] == "timeout":
-                stats.add_timeout(result["video_id"])
-            elif result["status"] == "unavailable":
-                stats.add_unavailable(result["video_id"])
-            else:
-                stats.add_failed(result["video_id"], result.get("error", "Unknown"))
-
-            # 진행 상황 출력 (10개마다)
-            if completed % 10 == 0 or completed == total:
-                print_progress(stats, total, completed)
-
-            # 진행 상황 저장 (100개마다)
-            if completed % 100 == 0:
-                save_progress(stats, args.output)
+            inflight.add(future)
+
+        while inflight:
+            done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                result = future.result()
+                completed += 1
+
+                if result["status"] == "success":
+                    stats.add_success(result.get("size", 0))
+                elif result["status"] == "timeout":
+                    stats.add_timeout(result["video_id"])
+                elif result["status"] == "unavailable":
+                    stats.add_unavailable(result["video_id"])
+                else:
+                    stats.add_failed(result["video_id"], result.get("error", "Unknown"))
+
+                # 저장은 리포터 스레드 몫 — 여기서는 플래그만
+                stats.dirty = True
+
+            # 끝난 만큼만 보충 — 중단 요청이면 보충하지 않고 윈도우를 비움
+            if not stop_flag.is_set():
+                for _ in range(len(done)):
+                    future = submit_one()
+                    if future is None:
+                        break
+                    inflight.add(future)
+
+    # 리포터 정리 후 최종 상태를 한 번 더 출력
+    report_stop.set()
+    reporter_t.join(timeout=2)
+    print_progress(stats, total, completed)
 
     # 최종 결과
     print("\n\n" + "="*60)
     print("다운로드 완료!")
     print("="*60)
 
-    summary = stats.get_summary()
-    total_mb = summary["total_bytes"] / 1024 / 1024
+    # 최종 수치는 캐시를 우회해서 읽음
+    summary = stats.get_summary(max_age=0.0)
+    total_mb = summary.total_bytes / 1024 / 1024
     total_gb = total_mb / 1024
-    elapsed = timedelta(seconds=int(summary["elapsed_seconds"]))
+    elapsed = timedelta(seconds=int(summary.elapsed_seconds))
 
     print(f"\n[결과]")
-    print(f"  성공: {summary['success']:,}개")
-    print(f"  실패: {summary['failed']:,}개")
-    print(f"  타임아웃: {summary['timeout']:,}개")
-    print(f"  영상 삭제/비공개: {summary['unavailable']:,}개")
-    print(f"  스킵 (기존): {summary['skipped']:,}개")
-
+    print(f"  성공: {summary.success:,}개")
+    print(f"  실패: {summary.failed:,}개")
+    print(f"  타임아웃: {summary.timeout:,}개")
+    print(f"  영상 삭제/비공개: {summary.unavailable:,}개")
+    print(f"  스킵 (기존): {summary.skipped:,}개")
+
+    avg_speed = (summary.total_bytes / summary.elapsed_seconds / 1024 / 1024
+                 if summary.elapsed_seconds > 0 else 0)
     print(f"\n[통계]")
     print(f"  총 다운로드: {total_gb:.2f} GB ({total_mb:.0f} MB)")
-    print(f"  평균 속도: {summary['speed_mbps']:.2f} MB/s")
+    print(f"  평균 속도: {avg_speed:.2f} MB/s")
     print(f"  소요 시간: {elapsed}")
 
-    if summary['success'] > 0:
-        avg_size = total_mb / summary['success']
+    if summary.success > 0:
+        avg_size = total_mb / summary.success
         print(f"  평균 파일 크기: {avg_size:.1f} MB")
 
-    # 에러 목록 저장
+    # 에러는 실패 시점에 이미 로그로 내려가 있음 — 마지막 재작성 불필요
     if stats.errors:
-        error_file = os.path.join(args.output, "download_errors.txt")
-        with open(error_file, "w") as f:
-            for vid_id, error in stats.errors:
-                f.write(f"{vid_id}\t{error}\n")
-        print(f"\n에러 목록 저장됨: {error_file}")
+        print(f"\n에러 목록: {os.path.join(args.output, 'download_errors.txt')}")
 
     # 최종 진행 상황 저장
     save_progress(stats, args.output)
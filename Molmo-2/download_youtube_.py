@@ -26,10 +26,27 @@ import threading
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
 import signal
 import sys
 
+# orjson이 있으면 사용 — 수백 MB URL 매핑/폴더 매핑 JSON 파싱이
+# C 구현으로 수 배 빨라짐. 없으면 표준 json으로 동작
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dump_json(path, obj):
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+except ImportError:
+    _loads = json.loads
+
+    def _dump_json(path, obj):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+
 
 # ──────────────────────────────────────────────
 # ffmpeg
@@ -56,6 +73,33 @@ def get_ffmpeg_path():
 
 FFMPEG_PATH = get_ffmpeg_path()
 
+# yt-dlp 한 번 기동(파이썬 임포트 + extractor 초기화)이 짧은 480p
+# 클립에서는 다운로드 자체와 맞먹음 — URL을 묶어 호출당 1회로
+BATCH_SIZE = 50
+
+# 배치마다 바뀌지 않는 인자는 한 번만 조립 (ffmpeg 위치 포함) —
+# 호출 시에는 -o/-a만 붙임
+_YTDLP_CMD_PREFIX = (
+    "yt-dlp",
+    *( ("--ffmpeg-location", os.path.dirname(FFMPEG_PATH)) if FFMPEG_PATH else () ),
+    "-f", "bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/bestvideo[height<=480]+bestaudio/best[height<=480]/best",
+    "--merge-output-format", "mp4",
+    "--no-warnings",
+    "-q",
+    "--no-progress",
+    "--retries", "2",
+    "--fragment-retries", "2",
+    "--buffer-size", "16K",
+    "--concurrent-fragments", "4",
+    "--no-overwrites",
+    "--no-write-info-json",
+    "--no-write-thumbnail",
+    "--no-write-description",
+    # 한 URL이 실패해도 배치의 나머지는 계속
+    "--ignore-errors",
+    "--print", "after_move:filepath",
+)
+
 
 # ──────────────────────────────────────────────
 # FolderManager: 서브폴더 분배 + 매핑 JSON 관리
@@ -73,7 +117,13 @@ class FolderManager:
         self.current_index = 1
         self.current_count = 0
         self.mapping = {}           # filename -> folder_name
+        self.folder_counts = defaultdict(int)  # folder_name -> 파일 수 (증분 유지)
         self.mapping_path = "video_folder_mapping.json"
+        # 배정 1건 = JSONL 한 줄 append. 전체 JSON 재작성은 종료 시 1회만
+        self.journal_path = self.mapping_path + ".jsonl"
+        self._journal_fp = None
+        self._created_folders = set()  # makedirs를 폴더당 1회만
+        self._same_dev = None          # temp와 출력 폴더가 같은 디바이스인지 (1회 판정)
         self.temp_dir = f".{base_name}-temp"
         os.makedirs(self.temp_dir, exist_ok=True)
 
@@ -82,22 +132,34 @@ class FolderManager:
     def load_existing(self):
         """기존 매핑 JSON 로드. 이미 받은 video_id set 반환."""
         if os.path.exists(self.mapping_path):
-            with open(self.mapping_path, "r", encoding="utf-8") as f:
-                self.mapping = json.load(f)
+            with open(self.mapping_path, "rb") as f:
+                self.mapping = _loads(f.read())
+
+        # 이전 실행이 도중에 끊겼으면 저널에만 남은 배정을 재생
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = _loads(line)
+                        self.mapping[rec["filename"]] = rec["folder"]
+                    except (ValueError, KeyError):
+                        pass
 
         # 폴더 인덱스/카운트 복원
-        folder_counts = defaultdict(int)
         max_index = 0
         for folder_name in self.mapping.values():
+            self.folder_counts[folder_name] += 1
             try:
                 idx = int(folder_name.rsplit("-", 1)[-1])
-                folder_counts[idx] += 1
                 max_index = max(max_index, idx)
             except ValueError:
                 pass
 
         if max_index > 0:
-            last_count = folder_counts[max_index]
+            last_count = self.folder_counts[f"{self.base_name}-{max_index:03d}"]
             if last_count >= self.per_folder:
                 self.current_index = max_index + 1
                 self.current_count = 0
@@ -105,8 +167,38 @@ class FolderManager:
                 self.current_index = max_index
                 self.current_count = last_count
 
+        self._sweep_temp()
+
         return {os.path.splitext(f)[0] for f in self.mapping}
 
+    def _sweep_temp(self):
+        """temp 폴더의 이전 실행 찌꺼기 정리.
+
+        .part/.ytdl 조각과 URL 목록 파일, 그리고 매핑에 없는 고아
+        비디오 파일을 지움 — 고아 파일은 이동 전에 죽은 미완성본이라
+        남겨두면 temp만 커지고 어차피 재다운로드 대상임.
+        """
+        removed = 0
+        try:
+            with os.scandir(self.temp_dir) as it:
+                for entry in it:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    name = entry.name
+                    if not (name.endswith((".part", ".ytdl", ".err"))
+                            or name.startswith(".urls_")
+                            or f"{name.split('.', 1)[0]}.mp4" not in self.mapping):
+                        continue
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                    except OSError:
+                        pass
+        except OSError:
+            return
+        if removed > 0:
+            print(f"temp 정리: 이전 실행 찌꺼기 {removed}개 삭제")
+
     # ── 성공 파일을 서브폴더로 이동 ──
 
     def assign_file(self, video_id):
@@ -118,34 +210,66 @@ class FolderManager:
         filename = f"{video_id}.mp4"
         src_path = os.path.join(self.temp_dir, filename)
 
+        # 락 안에서는 슬롯 예약(폴더 결정 + 카운터/매핑 갱신)만 수행.
+        # 파일 이동은 락 밖에서 — 느린 rename 하나가 다른 워커들의
+        # 배정을 전부 직렬화하지 않게 함. makedirs는 폴더당 1회뿐이라
+        # 락 안에 둬서 "폴더 생성 전에 rename" 레이스를 피함
         with self.lock:
             folder_name = f"{self.base_name}-{self.current_index:03d}"
-            folder_path = folder_name
-            os.makedirs(folder_path, exist_ok=True)
-
-            dest_path = os.path.join(folder_path, filename)
-            # 같은 파일시스템이면 rename (빠름), 아니면 shutil.move
-            try:
-                os.rename(src_path, dest_path)
-            except OSError:
-                shutil.move(src_path, dest_path)
+            if folder_name not in self._created_folders:
+                os.makedirs(folder_name, exist_ok=True)
+                self._created_folders.add(folder_name)
 
             self.mapping[filename] = folder_name
+            self.folder_counts[folder_name] += 1
+            # 저널에 한 줄 append (line-buffered) — 크래시해도 여기까지의
+            # 배정은 다음 실행의 load_existing이 재생함
+            if self._journal_fp is None:
+                self._journal_fp = open(self.journal_path, "a",
+                                        encoding="utf-8", buffering=1)
+            self._journal_fp.write(
+                json.dumps({"filename": filename, "folder": folder_name}) + "\n")
             self.current_count += 1
 
             if self.current_count >= self.per_folder:
                 self.current_index += 1
                 self.current_count = 0
 
-            return folder_name, dest_path
+        dest_path = os.path.join(folder_name, filename)
+        # temp 폴더가 출력 폴더와 같은 부모 밑(.{base}-temp)에 있어서
+        # 보통 같은 디바이스 — st_dev를 첫 호출에 한 번만 비교해 두고,
+        # 같으면 파일마다 예외 처리 없이 os.replace(메타데이터 연산)로
+        # 직행, 다르면 처음부터 shutil.move(바이트 복사)
+        if self._same_dev is None:
+            try:
+                self._same_dev = (os.stat(self.temp_dir).st_dev
+                                  == os.stat(folder_name).st_dev)
+            except OSError:
+                self._same_dev = False
+        if self._same_dev:
+            os.replace(src_path, dest_path)
+        else:
+            shutil.move(src_path, dest_path)
+
+        return folder_name, dest_path
 
     # ── 매핑 JSON 저장 ──
 
     def save_mapping(self):
+        """저널을 전체 JSON으로 통합 (tmp에 쓰고 원자적 교체)."""
         with self.lock:
             snapshot = dict(self.mapping)
-        with open(self.mapping_path, "w", encoding="utf-8") as f:
-            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            if self._journal_fp is not None:
+                self._journal_fp.close()
+                self._journal_fp = None
+        tmp_path = self.mapping_path + ".tmp"
+        _dump_json(tmp_path, snapshot)
+        os.replace(tmp_path, self.mapping_path)
+        # 통합됐으니 저널은 제거
+        try:
+            os.remove(self.journal_path)
+        except OSError:
+            pass
 
     def get_status_str(self):
         with self.lock:
@@ -166,7 +290,9 @@ class DownloadStats:
         self.unavailable = 0
         self.total_bytes = 0
         self.start_time = time.time()
-        self.errors = []
+        # 무한정 쌓지 않음 — 전체 목록은 어차피 마지막 200개만 쓰고,
+        # 수십만 건 실패 시 메모리만 먹음
+        self.errors = deque(maxlen=200)
 
     def add_success(self, size_bytes=0):
         with self.lock:
@@ -193,6 +319,9 @@ class DownloadStats:
             self.errors.append((video_id, "Video unavailable"))
 
     def get_summary(self):
+        # 락 없이 읽음 — int 읽기는 GIL로 원자적이고, 진행 표시용
+        # 스냅샷이 카운터 간 완벽히 일관될 필요는 없음. 워커들이
+        # add_*마다 잡는 락을 1초마다 도는 리포트가 두고 다투지 않게 함
         elapsed = time.time() - self.start_time
         speed = self.total_bytes / elapsed / 1024 / 1024 if elapsed > 0 else 0
         return {
@@ -211,90 +340,117 @@ class DownloadStats:
 # 데이터 로드
 # ──────────────────────────────────────────────
 def load_required_video_ids(filepath="all_required_video_ids.txt"):
-    with open(filepath, "r") as f:
-        return [line.strip() for line in f if line.strip()]
+    # 한 번에 읽고 splitlines — 라인 단위 strip을 두 번 하지 않음
+    return [s for s in Path(filepath).read_text().splitlines() if s]
 
 
 def load_url_mapping(filepath="youtube_id_to_urls_mapping.json"):
-    with open(filepath, "r") as f:
-        return json.load(f)
+    # 바이너리로 읽어 디코딩 중간 단계 없이 바로 파싱
+    with open(filepath, "rb") as f:
+        return _loads(f.read())
 
 
 # ──────────────────────────────────────────────
-# 다운로드 (임시 폴더로)
+# 다운로드 (임시 폴더로, 배치 단위)
 # ──────────────────────────────────────────────
-def download_video(video_id, youtube_url, temp_dir, timeout=120):
+def download_batch(batch, temp_dir, timeout=120, on_file=None):
     """
-    yt-dlp로 비디오를 temp_dir에 다운로드.
-    성공 시 temp_dir/{video_id}.mp4 파일이 생성됨.
+    yt-dlp 한 번 호출로 배치 전체를 temp_dir에 다운로드.
+
+    URL 목록을 파일(-a)로 넘겨 프로세스 기동/임포트 비용을 배치당
+    1회로 줄이고, --print after_move:filepath가 찍는 완료 경로를
+    stdout에서 한 줄씩 읽어 on_file 콜백에 즉시 넘김 — 배치가 다
+    끝나기 전에 완료된 파일부터 서브폴더로 옮길 수 있음.
+
+    batch: [(video_id, youtube_url), ...]
+    Returns: 비디오별 결과 dict 리스트
     """
-    output_path = os.path.join(temp_dir, f"{video_id}.mp4")
-    temp_path = os.path.join(temp_dir, f"{video_id}.%(ext)s")
+    list_path = os.path.join(temp_dir, f".urls_{id(batch) & 0xffffff:06x}.txt")
+    with open(list_path, "w") as f:
+        f.write("\n".join(url for _, url in batch) + "\n")
 
     cmd = [
-        "yt-dlp",
-        "-f", "bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/bestvideo[height<=480]+bestaudio/best[height<=480]/best",
-        "--merge-output-format", "mp4",
-        "-o", temp_path,
-        "--no-warnings",
-        "-q",
-        "--no-progress",
-        "--retries", "2",
-        "--fragment-retries", "2",
-        "--buffer-size", "16K",
-        "--no-overwrites",
-        "--no-write-info-json",
-        "--no-write-thumbnail",
-        "--no-write-description",
-        youtube_url,
+        *_YTDLP_CMD_PREFIX,
+        "-o", os.path.join(temp_dir, "%(id)s.%(ext)s"),
+        "-a", list_path,
     ]
 
-    if FFMPEG_PATH:
-        cmd.insert(1, "--ffmpeg-location")
-        cmd.insert(2, os.path.dirname(FFMPEG_PATH))
+    printed = {}  # video_id -> yt-dlp가 보고한 최종 경로
+    timed_out = False
+    stderr_text = ""
+    err_path = list_path + ".err"
+
+    def _kill():
+        nonlocal timed_out
+        timed_out = True
+        proc.kill()
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-
-        # 다운로드된 파일 확인
-        actual_path = None
-        for ext in [".mp4", ".mkv", ".webm"]:
-            check_path = os.path.join(temp_dir, f"{video_id}{ext}")
-            if os.path.exists(check_path) and os.path.getsize(check_path) > 10000:
-                actual_path = check_path
-                break
+        # stderr는 파일로 — stdout을 스트리밍으로 읽는 동안 파이프
+        # 버퍼가 차서 교착되는 일이 없음
+        with open(err_path, "w+") as err_fp:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err_fp,
+                                    text=True, bufsize=1)
+            # 타임아웃은 비디오당 기준을 배치 크기로 환산
+            killer = threading.Timer(timeout * len(batch), _kill)
+            killer.start()
+            try:
+                for line in proc.stdout:
+                    path = line.strip()
+                    if not path:
+                        continue
+                    vid = os.path.splitext(os.path.basename(path))[0]
+                    printed[vid] = path
+                    if on_file is not None:
+                        on_file(vid, path)
+                proc.wait()
+            finally:
+                killer.cancel()
+            if proc.returncode != 0:
+                err_fp.seek(0)
+                stderr_text = err_fp.read()
+    except Exception as e:
+        stderr_text = str(e)
+    finally:
+        for p in (list_path, err_path):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
 
-        if actual_path:
-            file_size = os.path.getsize(actual_path)
-            # mp4가 아니면 이름 변경
-            if actual_path != output_path and os.path.exists(actual_path):
-                if os.path.exists(output_path):
-                    os.remove(output_path)
-                os.rename(actual_path, output_path)
-            return {
-                "status": "success",
-                "video_id": video_id,
-                "path": output_path,
-                "size": file_size,
-            }
+    # 배치 멤버별 결과 판정 — 성공은 이미 on_file로 처리됨
+    if timed_out:
+        # 부분 다운로드 찌꺼기 정리: 비디오×확장자만큼 exists를 찍는
+        # 대신 temp 디렉토리를 한 번 스캔해서 prefix 매칭으로 지움
+        leftover_ids = {vid for vid, _ in batch if vid not in printed}
+        try:
+            with os.scandir(temp_dir) as it:
+                for entry in it:
+                    if entry.name.split(".", 1)[0] in leftover_ids:
+                        try:
+                            os.remove(entry.path)
+                        except Exception:
+                            pass
+        except OSError:
+            pass
+
+    results = []
+    stderr_low = stderr_text.lower()
+    for video_id, _ in batch:
+        if video_id in printed:
+            results.append({"status": "success", "video_id": video_id,
+                            "path": printed[video_id]})
+            continue
+
+        if timed_out:
+            results.append({"status": "timeout", "video_id": video_id})
+        elif any(kw in stderr_low for kw in ["unavailable", "private", "removed", "not available"]):
+            results.append({"status": "unavailable", "video_id": video_id,
+                            "error": "Video unavailable"})
         else:
-            stderr = result.stderr.lower() if result.stderr else ""
-            if any(kw in stderr for kw in ["unavailable", "private", "removed", "not available"]):
-                return {"status": "unavailable", "video_id": video_id, "error": result.stderr}
-            return {"status": "failed", "video_id": video_id, "error": result.stderr or "Unknown error"}
-
-    except subprocess.TimeoutExpired:
-        for ext in [".mp4", ".mkv", ".webm", ".part", ".ytdl"]:
-            temp_file = os.path.join(temp_dir, f"{video_id}{ext}")
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except Exception:
-                    pass
-        return {"status": "timeout", "video_id": video_id}
-
-    except Exception as e:
-        return {"status": "failed", "video_id": video_id, "error": str(e)}
+            results.append({"status": "failed", "video_id": video_id,
+                            "error": stderr_text[-500:] if stderr_text else "Unknown error"})
+    return results
 
 
 # ──────────────────────────────────────────────
@@ -333,9 +489,8 @@ def save_progress(stats, folder_mgr):
         json.dump({
             "last_update": datetime.now().isoformat(),
             "stats": summary,
-            "errors": stats.errors[-100:],
+            "errors": list(stats.errors)[-100:],
         }, f, indent=2, ensure_ascii=False)
-    folder_mgr.save_mapping()
 
 
 # ──────────────────────────────────────────────
@@ -366,42 +521,51 @@ def main():
     print("URL 매핑 로드 중...")
     url_mapping = load_url_mapping()
 
+    # ── resume 매핑 로드 (목록 생성 전에 — 필터를 한 패스에 합치기 위해) ──
+    existing_ids = folder_mgr.load_existing()
+
     # ── 다운로드 목록 생성 ──
+    # URL 필터 + --start/--limit 범위 + 기존 파일 스킵을 한 루프에서 처리.
+    # 전체 리스트를 만들고 슬라이스/재필터하며 버려질 튜플을 만들지 않음.
+    # 범위 인덱스는 종전과 같이 "URL이 있는 항목" 기준
+    limit = args.limit if args.limit > 0 else 0
+    if args.test:
+        limit = 5 if limit == 0 else min(limit, 5)
+        print(f"\n테스트 모드: 5개만 다운로드")
+
     videos_to_download = []
     missing_mapping = 0
+    skipped = 0
+    in_range = 0    # 범위에 든 항목 수 (기존 파일 포함)
+    mapped_idx = 0  # URL이 있는 항목의 누적 인덱스
 
     for vid_id in video_ids:
-        if vid_id in url_mapping:
-            youtube_url = url_mapping[vid_id].get("youtube_url")
-            if youtube_url:
-                videos_to_download.append((vid_id, youtube_url))
-            else:
-                missing_mapping += 1
-        else:
+        # `in` + `[]`로 같은 키를 두 번 해싱하지 않게 get 한 번으로
+        entry = url_mapping.get(vid_id)
+        youtube_url = entry.get("youtube_url") if entry else None
+        if not youtube_url:
             missing_mapping += 1
+            continue
 
-    if missing_mapping > 0:
-        print(f"경고: {missing_mapping}개 비디오의 YouTube URL이 없음")
+        idx = mapped_idx
+        mapped_idx += 1
+        if idx < args.start:
+            continue
+        if limit and in_range >= limit:
+            break
+        in_range += 1
 
-    # 범위 적용
-    if args.start > 0:
-        videos_to_download = videos_to_download[args.start:]
-    if args.limit > 0:
-        videos_to_download = videos_to_download[:args.limit]
-    if args.test:
-        videos_to_download = videos_to_download[:5]
-        print(f"\n테스트 모드: 5개만 다운로드")
+        if vid_id in existing_ids:
+            skipped += 1
+            continue
+        videos_to_download.append((vid_id, youtube_url))
 
-    print(f"다운로드 대상: {len(videos_to_download):,}개")
+    if missing_mapping > 0:
+        print(f"경고: {missing_mapping}개 비디오의 YouTube URL이 없음")
 
-    # ── resume: 이미 받은 파일 스킵 ──
-    existing_ids = folder_mgr.load_existing()
-    if existing_ids:
-        before = len(videos_to_download)
-        videos_to_download = [(vid, url) for vid, url in videos_to_download if vid not in existing_ids]
-        skipped = before - len(videos_to_download)
-        if skipped > 0:
-            print(f"이미 다운로드됨 (스킵): {skipped:,}개")
+    print(f"다운로드 대상: {in_range:,}개")
+    if skipped > 0:
+        print(f"이미 다운로드됨 (스킵): {skipped:,}개")
 
     if not videos_to_download:
         print("\n다운로드할 새 비디오가 없습니다!")
@@ -431,46 +595,81 @@ def main():
 
     print(f"\n다운로드 시작...\n")
 
-    # ── 병렬 다운로드 ──
+    # 완료 라인이 오는 즉시 temp -> 서브폴더 이동 + 집계 (워커 스레드에서)
+    def on_file(vid_id, path):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        if size > 10000:
+            # 병합되지 않은 단일 포맷(webm 등)은 mp4 이름으로 맞춰줌
+            if not path.endswith(".mp4"):
+                mp4_path = os.path.join(folder_mgr.temp_dir, f"{vid_id}.mp4")
+                try:
+                    os.rename(path, mp4_path)
+                except OSError:
+                    pass
+            folder_mgr.assign_file(vid_id)
+            stats.add_success(size)
+        else:
+            stats.add_failed(vid_id, "File too small")
+
+    # BATCH_SIZE개씩 묶음 — yt-dlp 기동 비용을 배치당 1회로
+    batches = [videos_to_download[i:i + BATCH_SIZE]
+               for i in range(0, len(videos_to_download), BATCH_SIZE)]
+
+    # ── 병렬 다운로드 (배치 단위) ──
     completed = 0
+
+    # 진행 표시/주기 저장은 전담 리포터 스레드가 1초마다 — 다운로드
+    # 루프는 집계만 하고 터미널 I/O에 블로킹되지 않음
+    report_stop = threading.Event()
+
+    def reporter():
+        last_saved = 0
+        while not report_stop.wait(1.0):
+            print_progress(stats, total, completed, folder_mgr)
+            if completed - last_saved >= 100:
+                last_saved = completed
+                save_progress(stats, folder_mgr)
+
+    reporter_t = threading.Thread(target=reporter, daemon=True)
+    reporter_t.start()
+
     with ThreadPoolExecutor(max_workers=args.workers) as executor:
         futures = {}
 
-        for vid_id, url in videos_to_download:
+        for batch in batches:
             if stop_flag.is_set():
                 break
             future = executor.submit(
-                download_video,
-                vid_id, url,
+                download_batch,
+                batch,
                 folder_mgr.temp_dir,
                 args.timeout,
+                on_file,
             )
-            futures[future] = vid_id
+            futures[future] = batch
 
         for future in as_completed(futures):
             if stop_flag.is_set():
                 break
 
-            result = future.result()
-            completed += 1
-
-            if result["status"] == "success":
-                # 성공: temp -> 서브폴더로 이동
-                folder_mgr.assign_file(result["video_id"])
-                stats.add_success(result.get("size", 0))
-            elif result["status"] == "timeout":
-                stats.add_timeout(result["video_id"])
-            elif result["status"] == "unavailable":
-                stats.add_unavailable(result["video_id"])
-            else:
-                stats.add_failed(result["video_id"], result.get("error", "Unknown"))
-
-            if completed % 10 == 0 or completed == total:
-                print_progress(stats, total, completed, folder_mgr)
-
-            # 매핑 JSON + progress 주기적 저장
-            if completed % 100 == 0:
-                save_progress(stats, folder_mgr)
+            for result in future.result():
+                completed += 1
+                status = result["status"]
+                if status == "success":
+                    pass  # on_file에서 이미 이동/집계됨
+                elif status == "timeout":
+                    stats.add_timeout(result["video_id"])
+                elif status == "unavailable":
+                    stats.add_unavailable(result["video_id"])
+                else:
+                    stats.add_failed(result["video_id"], result.get("error", "Unknown"))
+
+    report_stop.set()
+    reporter_t.join(timeout=2)
+    print_progress(stats, total, completed, folder_mgr)
 
     # ── 최종 결과 ──
     # 매핑 JSON 최종 저장
@@ -501,13 +700,11 @@ def main():
         avg_size = total_mb / summary['success']
         print(f"  평균 파일 크기: {avg_size:.1f} MB")
 
-    # 폴더 분배 현황
-    folder_counts = defaultdict(int)
-    for folder_name in folder_mgr.mapping.values():
-        folder_counts[folder_name] += 1
+    # 폴더 분배 현황 — FolderManager가 증분 유지한 카운트 사용
+    # (매핑 전체를 다시 세지 않음)
     print(f"\n[폴더 분배]")
-    for fname in sorted(folder_counts):
-        print(f"  {fname}: {folder_counts[fname]}개")
+    for fname in sorted(folder_mgr.folder_counts):
+        print(f"  {fname}: {folder_mgr.folder_counts[fname]}개")
     print(f"  매핑 파일: {folder_mgr.mapping_path}")
 
     # 에러 목록 저장
@@ -11,6 +11,11 @@ molmo2-videos 폴더의 영상을 200개씩 서브폴더로 분배하고,
 import os
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# rename은 순수 메타데이터 syscall이라 CPU를 안 잡음 — 스레드로 겹치면
+# (특히 네트워크 FS에서) 왕복 지연이 병렬로 숨겨짐
+MOVE_WORKERS = 16
 
 
 def main():
@@ -27,10 +32,10 @@ def main():
         return
 
     # 비디오 파일 목록 수집 (파일만, 디렉토리 제외)
-    files = sorted(
-        f for f in os.listdir(src_dir)
-        if os.path.isfile(os.path.join(src_dir, f))
-    )
+    # listdir+파일별 isfile(stat N번) 대신 scandir — 디렉토리 엔트리의
+    # 타입 정보를 그대로 써서 추가 syscall 없음
+    with os.scandir(src_dir) as it:
+        files = sorted(e.name for e in it if e.is_file(follow_symlinks=False))
 
     if not files:
         print("이동할 파일이 없습니다.")
@@ -41,23 +46,35 @@ def main():
     print(f"생성될 폴더 수: {(len(files) + per_folder - 1) // per_folder}개")
 
     mapping = {}  # filename -> folder_name
+    parent_dir = os.path.dirname(src_dir.rstrip("/"))
 
+    # 작업 목록을 먼저 만들고 폴더는 미리 한 번에 생성 —
+    # 루프 안에서 파일마다 isdir/makedirs를 찍을 필요가 없음
+    tasks = []  # (old_path, new_path)
     for i, filename in enumerate(files):
         folder_idx = i // per_folder + 1
         folder_name = f"molmo2-videos-{folder_idx:03d}"
-        folder_path = os.path.join(os.path.dirname(src_dir.rstrip("/")), folder_name)
-
-        if not os.path.isdir(folder_path):
-            os.makedirs(folder_path)
-
-        old_path = os.path.join(src_dir, filename)
-        new_path = os.path.join(folder_path, filename)
-        os.rename(old_path, new_path)
-
         mapping[filename] = folder_name
+        tasks.append((
+            os.path.join(src_dir, filename),
+            os.path.join(parent_dir, folder_name, filename),
+        ))
+
+    n_folders = (len(files) + per_folder - 1) // per_folder
+    for folder_idx in range(1, n_folders + 1):
+        os.makedirs(os.path.join(parent_dir, f"molmo2-videos-{folder_idx:03d}"),
+                    exist_ok=True)
+
+    def move_one(task):
+        old_path, new_path = task
+        os.rename(old_path, new_path)
 
-        if (i + 1) % 1000 == 0:
-            print(f"  {i + 1:,}/{len(files):,} 이동 완료...")
+    moved = 0
+    with ThreadPoolExecutor(max_workers=MOVE_WORKERS) as executor:
+        for _ in executor.map(move_one, tasks, chunksize=64):
+            moved += 1
+            if moved % 1000 == 0:
+                print(f"  {moved:,}/{len(files):,} 이동 완료...")
 
     # 매핑 JSON 저장 (원본 폴더와 같은 레벨에)
     mapping_path = os.path.join(os.path.dirname(src_dir.rstrip("/")), "video_folder_mapping.json")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""download_youtube.py 스모크 테스트 (네트워크 없음)
+
+yt_dlp를 가짜 모듈로 바꿔서 download_video 경로를 끝까지 태움 —
+특히 outtmpl이 실제 YoutubeDL처럼 {"default": ...} dict 형태로
+전달되는지 검증 (str을 넣으면 prepare_filename의 .get()에서
+AttributeError가 나고, download_video의 except Exception이 삼켜
+전 건수가 조용히 failed가 되는 회귀가 있었음).
+
+실행:
+    python test_download_youtube.py
+    python -m pytest -q test_download_youtube.py
+"""
+
+import os
+import sys
+import tempfile
+import types
+
+# ── 가짜 yt_dlp 주입 (import download_youtube 전에) ──
+
+
+class _FakeYoutubeDL:
+    """YoutubeDL 흉내 — outtmpl 처리 방식은 실제와 동일하게 엄격"""
+
+    def __init__(self, params):
+        self.params = params
+
+    def extract_info(self, url, download=True):
+        # 실제 YoutubeDL은 outtmpl을 dict로 정규화해 두고 .get()으로
+        # 꺼냄 — str이 들어오면 여기서 AttributeError (회귀 재현 지점)
+        tmpl = self.params["outtmpl"].get("default")
+        path = tmpl % {"ext": "mp4"}
+        with open(path, "wb") as f:
+            f.write(b"\0" * 20000)  # 10KB 최소 크기 체크 통과
+        return {"requested_downloads": [{"filepath": path}]}
+
+
+class _FakeDownloadError(Exception):
+    pass
+
+
+_fake = types.ModuleType("yt_dlp")
+_fake.utils = types.ModuleType("yt_dlp.utils")
+_fake.utils.DownloadError = _FakeDownloadError
+_fake.YoutubeDL = _FakeYoutubeDL
+sys.modules["yt_dlp"] = _fake
+sys.modules["yt_dlp.utils"] = _fake.utils
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import download_youtube as dy  # noqa: E402
+
+
+def test_download_video_success():
+    with tempfile.TemporaryDirectory() as output_dir:
+        result = dy.download_video(
+            "vid123", "https://youtube.com/watch?v=vid123", output_dir, timeout=30
+        )
+        assert result["status"] == "success", result
+        assert result["size"] == 20000
+        assert os.path.exists(os.path.join(output_dir, "vid123.mp4"))
+
+
+def test_download_video_unavailable():
+    def _raise(self, url, download=True):
+        raise _FakeDownloadError("ERROR: Video unavailable")
+
+    orig = _FakeYoutubeDL.extract_info
+    _FakeYoutubeDL.extract_info = _raise
+    try:
+        # 스레드 로컬 인스턴스는 이미 만들어졌을 수 있으므로 클래스 패치
+        with tempfile.TemporaryDirectory() as output_dir:
+            result = dy.download_video(
+                "vid404", "https://youtube.com/watch?v=vid404", output_dir, timeout=30
+            )
+            assert result["status"] == "unavailable", result
+    finally:
+        _FakeYoutubeDL.extract_info = orig
+
+
+if __name__ == "__main__":
+    test_download_video_success()
+    test_download_video_unavailable()
+    print("OK: download_video 스모크 테스트 통과")